@@ -0,0 +1,117 @@
+import numpy as np
+from collections import Counter
+from scipy.stats import ttest_ind_from_stats
+
+
+class RunningStats:
+    """Count, mean and sum of squared deviations (M2) of a stream of values, updated online
+    (Welford / Chan et al.), so that the values themselves never need to be kept.
+    Two RunningStats can be merged, e.g. the ones computed by different processes."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, values):
+        """ Add a batch of values.
+
+        Parameters:
+        values ([float, list(float), np.array(float)]): the values """
+
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if len(values) == 0:
+            return
+
+        # the statistics of the batch, merged as a whole
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other):
+        """ Add all the values of other.
+
+        Parameters:
+        other (RunningStats): the statistics to add
+
+        Returns:
+        RunningStats: self """
+
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+
+        return self
+
+    def variance(self, ddof=0):
+        """ Parameters:
+        ddof (int): delta degrees of freedom, as in np.var (0: population variance, 1: sample variance)
+
+        Returns:
+        float: the variance (nan if there are not enough values) """
+
+        return self.m2 / (self.count - ddof) if self.count > ddof else float('nan')
+
+    def std(self, ddof=0):
+        """ Returns:
+        float: the standard deviation (see variance) """
+
+        return self.variance(ddof) ** 0.5
+
+    def ttest(self, other, equal_var=True):
+        """ Two-sample t-test, from the summary statistics only (same result as scipy.stats.ttest_ind on the values).
+
+        Parameters:
+        other (RunningStats): the other sample
+        equal_var (bool): Student's test if True, Welch's test otherwise
+
+        Returns:
+        float, float: the t statistic and the p-value """
+
+        return ttest_ind_from_stats(self.mean, self.std(ddof=1), self.count,
+                                    other.mean, other.std(ddof=1), other.count, equal_var=equal_var)
+
+
+class CellAggregator:
+    """The summary of the elections of a (graph type, paradigm, rule) cell of a sweep:
+    RunningStats of every metric, and how many times every alternative won."""
+
+    def __init__(self, metrics):
+        """ Parameters:
+        metrics (list(str)): the names of the metrics """
+
+        self.stats = {metric: RunningStats() for metric in metrics}
+        self.winners = Counter()
+
+    def add(self, winners, **metrics):
+        """ Add a batch of elections.
+
+        Parameters:
+        winners (list(int)): the winner of every election
+        metrics: the values of every metric, one per election """
+
+        self.winners.update(winners)
+        for metric, values in metrics.items():
+            self.stats[metric].add(values)
+
+    def merge(self, other):
+        """ Add all the elections of other.
+
+        Parameters:
+        other (CellAggregator): the summary to add
+
+        Returns:
+        CellAggregator: self """
+
+        self.winners.update(other.winners)
+        for metric, stats in other.stats.items():
+            self.stats[metric].merge(stats)
+
+        return self
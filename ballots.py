@@ -0,0 +1,93 @@
+import numpy as np
+from math import factorial
+
+
+class BallotCodec:
+    """Maps strict orders over a fixed set of alternatives to their permutation rank (the index of the
+    order among all the m! orders, in lexicographic order, via its Lehmer code) and back.
+    Everything is vectorized: ballots are (n, m) arrays, ids are (n,) arrays of int64 (so m <= 20)."""
+
+    def __init__(self, alternatives):
+        """ Parameters:
+        alternatives (iterable(int)): the alternatives (positive integers) """
+
+        self.alternatives = sorted(alternatives)
+        self.m = len(self.alternatives)
+        assert self.m <= 20, 'Permutation ranks of more than 20 alternatives do not fit in 64 bits.'
+
+        self._labels = np.array(self.alternatives, dtype=np.int64)
+        # label -> index of the alternative
+        self._index = np.full(max(self.alternatives) + 1, -1, dtype=np.int64)
+        self._index[self._labels] = np.arange(self.m)
+
+        # weight of each Lehmer digit: (m-1)!, (m-2)!, ..., 0!
+        self._factorials = np.array([factorial(self.m - 1 - i) for i in range(self.m)], dtype=np.int64)
+
+    def encode(self, ballots):
+        """ Parameters:
+        ballots ([list(list(int)), np.array(int)]): (n, m) strict orders
+
+        Returns:
+        np.array(int64): (n,) permutation ranks """
+
+        idx = self._index[np.asarray(ballots, dtype=np.int64).reshape(-1, self.m)]
+        ids = np.zeros(len(idx), dtype=np.int64)
+        # Lehmer digit of position i: how many alternatives after i come before it in the sorted order.
+        # one position at a time, so the temporaries stay (n, m)
+        for i in range(self.m - 1):
+            ids += (idx[:, i + 1:] < idx[:, i, None]).sum(axis=1) * self._factorials[i]
+        return ids
+
+    def decode(self, ids):
+        """ Parameters:
+        ids (np.array(int)): (n,) permutation ranks
+
+        Returns:
+        np.array(int64): (n, m) strict orders """
+
+        ids = np.array(ids, dtype=np.int64).reshape(-1)
+        # one row per position (contiguous columns are faster to update)
+        idx = np.empty((self.m, len(ids)), dtype=np.int64)
+
+        # the Lehmer digits
+        for i, f in enumerate(self._factorials):
+            idx[i], ids = np.divmod(ids, f)
+
+        # from the right: every digit counts the alternatives left after the previous positions,
+        # so the later positions skip the alternatives taken before them
+        for i in range(self.m - 2, -1, -1):
+            for j in range(i + 1, self.m):
+                idx[j] += idx[j] >= idx[i]
+
+        return self._labels[idx.T]
+
+    def count(self, ballots, weights=None):
+        """ Count the distinct ballots.
+
+        Parameters:
+        ballots ([list(list(int)), np.array(int)]): (n, m) strict orders
+        weights (np.array(int)): how many voters each ballot stands for (1 by default)
+
+        Returns:
+        np.array(int64), np.array(int64): the distinct ballot ids (sorted) and their counts """
+
+        return self.count_ids(self.encode(ballots), weights)
+
+    @staticmethod
+    def count_ids(ids, weights=None):
+        """ Same as count, on ballot ids """
+
+        unique, inverse = np.unique(ids, return_inverse=True)
+        if weights is None:
+            counts = np.bincount(inverse.ravel(), minlength=len(unique))
+        else:
+            counts = np.bincount(inverse.ravel(), weights=weights, minlength=len(unique)).astype(np.int64)
+        return unique, counts
+
+    def to_lists(self, ids, counts):
+        """ The usual (preferences, counts) view of a profile.
+
+        Returns:
+        list(list(int)), list(int): all the ballots with their counts """
+
+        return self.decode(ids).tolist(), np.asarray(counts).tolist()
@@ -1,7 +1,10 @@
 import argparse
 import os
-import itertools as it
-from random import randint
+import random
+import numpy as np
+from math import factorial
+from ballots import BallotCodec
+from preflib import PrefLibReader
 from votingrules import VotingRules
 from voter_type import VoterTypes
 
@@ -17,95 +20,79 @@ class Dataset:
         self.preferences, self.counts, candidates = self._process_data(source, rand_params, type_generation)
         self.candidates = set(range(1, candidates + 1))
 
-    @staticmethod
-    def _is_int(s):
-        """check if string is an int"""
-        try:
-            int(s)
-            return True
-        except:
-            return False
+    # voters drawn at once by the synthetic sources (bounds the memory of large electorates)
+    CHUNK_VOTERS = 2**20
 
     def _process_data(self, source, param, type_generation):
         """process preflib dataset or make synth data"""
-        preferences = []
-        counts = []
 
         # generate preferences uniformly
         if source == 'random':
-            # make synthetic data; reproduce preflib format
             assert len(param) >= 2, 'Specify all parameters for random generation [voterNr, prefNr]'
             candidates = list(range(1, param[0] + 1))
-            voters = param[1]
-            pref_permutations = list(it.permutations(candidates))
-
-            profile = dict()
-            for v in range(voters):
-                perm = randint(0, len(pref_permutations) - 1)
-                ballot = list(pref_permutations[perm])
-                ballot_id = "".join([str(i) for i in ballot])
-                try:
-                    cnt = profile[ballot_id][0]
-                    cnt += 1
-                    profile[ballot_id] = [cnt] + ballot
-                except:
-                    profile[ballot_id] = [1] + ballot
-
-            headless_tokens = list(profile.values())
-            header = [[param[0]]]
-            for c in candidates:
-                header.append(f'{str(c)}:')
-            header.append('x,x,x') # in preflib this line is for extra info (nr of voters/ballots/...)
-            tokens = header + headless_tokens
+            preferences, counts = self._impartial_culture(candidates, param[1])
+            return preferences, counts, param[0]
 
         # generate preferences according to types
         elif source == 'type_random':
-            # make synthetic data; reproduce preflib format
             candidates = list(range(1, param[0] + 1))
             assert len(param) >= 3, 'Specify all parameters for type_random generation [voterNr, prefNr, typeNr]'
-            assert len(candidates) == 4, 'type_random generation supported only for 4 alternatives'
             voters = param[1]
             types = param[2]
-            generator = VoterTypes(num_types=types, gen_type=type_generation)
-
-            profile = dict()
-            for v in range(voters):
-                ballot = generator.generate()
-                ballot_id = "".join([str(i) for i in ballot])
-                try:
-                    cnt = profile[ballot_id][0]
-                    cnt += 1
-                    profile[ballot_id] = [cnt] + ballot
-                except:
-                    profile[ballot_id] = [1] + ballot
-
-            headless_tokens = list(profile.values())
-            header = [[param[0]]]
-            for c in candidates:
-                header.append(f'{str(c)}:')
-            header.append('x,x,x')  # in preflib this line is for extra info (nr of voters/ballots/...)
-            tokens = header + headless_tokens
+            generator = VoterTypes(num_types=types, gen_type=type_generation, num_alternatives=len(candidates))
+            codec = BallotCodec(candidates)
+
+            # all the voters at once
+            ballot_ids, ballot_counts = codec.count(generator.generate_batch(voters))
+            preferences, counts = codec.to_lists(ballot_ids, ballot_counts)
+            return preferences, counts, param[0]
 
         else:
             if not os.path.exists(source):
                 raise ValueError('Dataset: specified path (or source) does not exist')
 
-            with open(source, 'r') as f:
-                raw = f.readlines()
-                tokens = [[int(j) if self._is_int(j) else j for j in i.strip('\n').split(',')] for i in raw]
-
-        for line_num, line in enumerate(tokens):
-            if line_num == 0:
-                # get nr of candidates
-                candidates_nr = line[0]
-            elif line_num > candidates_nr + 1:
-                preferences.append(line[1:])
-                counts.append(line[0])
+            # preflib file: parsed in chunks, straight into arrays (ties of .toc files are flattened)
+            reader = PrefLibReader(source)
+            ballot_counts, ballots, _ = reader.read()
+            preferences = [ballot[ballot > 0].tolist() for ballot in ballots]
+            return preferences, ballot_counts.tolist(), reader.num_alternatives
+
+    def _impartial_culture(self, candidates, voters):
+        """ Every voter draws a uniformly random strict order, a chunk of voters at a time.
+        Up to 20 candidates, that is a uniformly random permutation rank (which is counted directly);
+        beyond, the argsort of random keys (and the orders are counted as rows).
+
+        Parameters:
+        candidates (list(int)): the candidates
+        voters (int): number of voters
+
+        Returns:
+        list(list(int)), list(int): the distinct ballots (in lexicographic order) and their counts """
+
+        # seeded from random, so that random.seed makes the dataset reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        codec = BallotCodec(candidates) if len(candidates) <= 20 else None
+        labels = np.array(candidates, dtype=np.int64)
+
+        keys, counts = [], []
+        for start in range(0, voters, self.CHUNK_VOTERS):
+            size = min(self.CHUNK_VOTERS, voters - start)
+            if codec is not None:
+                chunk_keys, chunk_counts = codec.count_ids(rng.integers(0, factorial(len(candidates)), size))
             else:
-                # candidate mapping; skip
-                pass
-
-        return preferences, counts, candidates_nr
+                ballots = labels[np.argsort(rng.random((size, len(candidates))), axis=1)]
+                chunk_keys, chunk_counts = np.unique(ballots, axis=0, return_counts=True)
+            keys.append(chunk_keys)
+            counts.append(chunk_counts)
+
+        if codec is not None:
+            ids, counts = codec.count_ids(np.concatenate(keys), np.concatenate(counts))
+            return codec.to_lists(ids, counts)
+
+        # merge the chunks
+        ballots, inverse = np.unique(np.concatenate(keys), axis=0, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=np.concatenate(counts), minlength=len(ballots)).astype(np.int64)
+        return ballots.tolist(), counts.tolist()
 
     def count_voters(self):
         """return total voters"""
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+from networks import CSRGraph, generate_graph
+
+try:
+    import fcntl
+except ImportError:  # not on Unix: no locking (a single process at a time should use the cache)
+    fcntl = None
+
+
+class GraphCache:
+    """On-disk cache of generated graphs, as CSR .npz files named after a hash of what determines
+    the graph: generator, parameters, number of voters and seed.
+
+    Files are written to a temporary file and renamed, so readers never see half a graph, and several
+    processes can share a cache. When the cache grows over max_bytes, the least recently used graphs
+    are deleted (under a lock on the directory)."""
+
+    VERSION = 1
+    LOCK = '.lock'
+
+    def __init__(self, directory, max_bytes=2**30):
+        """ Parameters:
+        directory (str): where the graphs are stored
+        max_bytes (int): maximum size of the cache """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, num_voters, gtype, seed, params):
+        """ str: the name of the file of a graph """
+
+        description = json.dumps({'version': self.VERSION, 'gtype': gtype, 'params': params,
+                                  'num_voters': num_voters, 'seed': seed}, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()[:32] + '.npz'
+
+    def get(self, num_voters, gtype='scale-free', seed=42, params=dict()):
+        """ Same as networks.generate_graph, but the graph is read from the cache if it is there
+        (and stored otherwise).
+
+        Returns:
+        CSRGraph: the graph """
+
+        path = os.path.join(self.directory, self.key(num_voters, gtype, seed, params))
+
+        try:
+            with np.load(path) as stored:
+                graph = CSRGraph(stored['indptr'], stored['indices'])
+            # mark it as recently used
+            os.utime(path)
+            return graph
+        except (OSError, EOFError, zipfile.BadZipFile, KeyError, ValueError):
+            # missing (or evicted meanwhile, or truncated, or corrupt): generate it again
+            pass
+
+        graph = CSRGraph.from_graph(generate_graph(num_voters, gtype, seed, params))
+        self._store(path, graph)
+        return graph
+
+    def _store(self, path, graph):
+        # write a temporary file, then rename it
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                np.savez_compressed(f, indptr=graph.indptr, indices=graph.indices)
+            os.replace(temporary, path)
+        except BaseException:
+            # e.g. a full disk: leave nothing behind
+            os.remove(temporary)
+            raise
+
+        self._evict()
+
+    def _evict(self):
+        """ Delete the least recently used graphs until the cache fits in max_bytes """
+
+        with open(os.path.join(self.directory, self.LOCK), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        """ Delete all the graphs """
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                os.remove(entry.path)
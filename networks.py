@@ -1,22 +1,141 @@
 import networkx as nx
-import random
+import numpy as np
 
 
-def random_network(n, p, seed):
-    random.seed(seed)
-    graph = dict()
-    for i in range(n):
-        graph[i] = []
-        for j in range(n):
-            if i != j:
-                if random.random() <= p:
-                    graph[i].append(j)
+class CSRGraph:
+    """An immutable directed graph on the nodes 0, ..., n-1, as a CSR adjacency:
+    the successors of node i are indices[indptr[i]:indptr[i+1]]."""
 
-    return nx.DiGraph(graph)
+    def __init__(self, indptr, indices):
+        """ Parameters:
+        indptr (np.array(int)): (n + 1,) offsets of the successors of every node
+        indices (np.array(int)): the successors of all the nodes """
 
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        assert self.indptr[0] == 0 and self.indptr[-1] == len(self.indices), 'indptr must go from 0 to len(indices)'
 
-# generate a random graph
-def generate_graphs(num_voters, num_graphs, gtype='scale-free', seed=42, params = dict()):
+        # the graph never changes
+        self.indptr.flags.writeable = False
+        self.indices.flags.writeable = False
+
+    @classmethod
+    def from_edges(cls, num_nodes, sources, targets):
+        """ Parameters:
+        num_nodes (int): number of nodes
+        sources, targets (np.array(int)): the edges, sorted by source """
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, targets)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """ Parameters:
+        graph (nx.DiGraph): a graph on the nodes 0, ..., n-1 """
+
+        edges = np.array(list(graph.edges()), dtype=np.int64).reshape(-1, 2)
+        assert len(edges) == 0 or edges.max() < graph.number_of_nodes(), 'The nodes must be 0, ..., n-1'
+        # group the edges by source, keeping the order of the successors
+        order = np.argsort(edges[:, 0], kind='stable')
+        return cls.from_edges(graph.number_of_nodes(), edges[order, 0], edges[order, 1])
+
+    @classmethod
+    def from_dict(cls, adjacency):
+        """ Parameters:
+        adjacency (dict(int, list(int))): the successors of every node (nodes are 0, ..., n-1) """
+
+        nodes = set(adjacency.keys()).union(*adjacency.values())
+        assert nodes == set(range(len(nodes))), 'The nodes must be 0, ..., n-1'
+        sources = np.repeat(sorted(adjacency.keys()), [len(adjacency[node]) for node in sorted(adjacency.keys())])
+        targets = [successor for node in sorted(adjacency.keys()) for successor in adjacency[node]]
+        return cls.from_edges(len(nodes), sources.astype(np.int64), np.array(targets, dtype=np.int64))
+
+    @classmethod
+    def from_graph(cls, graph):
+        """ Parameters:
+        graph ([CSRGraph, nx.DiGraph, dict(int, list(int))]): a graph on the nodes 0, ..., n-1
+
+        Returns:
+        CSRGraph: the same graph (itself, if it is a CSRGraph already) """
+
+        if isinstance(graph, cls):
+            return graph
+        elif isinstance(graph, nx.DiGraph):
+            return cls.from_networkx(graph)
+        elif isinstance(graph, dict):
+            return cls.from_dict(graph)
+        else:
+            raise TypeError(f'Cannot make a graph out of {type(graph)}')
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def successors(self, node):
+        """ np.array(int32): the successors of a node """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def to_networkx(self):
+        """ nx.DiGraph: the same graph (isolated nodes included) """
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(range(self.num_nodes))
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        graph.add_edges_from(zip(sources.tolist(), self.indices.tolist()))
+        return graph
+
+
+def random_network(n, p, seed, as_csr=False):
+    """ Random directed graph (Erdős–Rényi): every ordered pair (i, j), i != j, is an edge with probability p.
+
+    Instead of flipping a coin for each of the n(n-1) pairs, the gaps between consecutive edges
+    (in the order of the pairs) are drawn from a geometric distribution, in batches: the time is
+    proportional to the number of edges.
+
+    Parameters:
+    n (int): number of nodes
+    p (float): probability of every edge
+    seed ([int, np.random.Generator, NoneType]): seed, or generator to draw from
+    as_csr (bool): return a CSRGraph instead of a networkx graph
+
+    Returns:
+    [nx.DiGraph, CSRGraph]: the graph """
+
+    rng = np.random.default_rng(seed)
+    pairs = n * (n - 1)
+
+    # positions of the edges among all the pairs
+    chunks = []
+    last = -1
+    if p > 0 and pairs > 0:
+        p = min(p, 1.0)
+        while True:
+            # enough gaps to (most likely) get past the last pair in one go
+            expected = (pairs - last - 1) * p
+            size = int(expected + 5 * (expected * (1 - p)) ** 0.5) + 16
+            positions = last + np.cumsum(rng.geometric(p, size=size))
+            chunks.append(positions[positions < pairs])
+            if positions[-1] >= pairs:
+                break
+            last = positions[-1]
+
+    positions = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    # the k-th pair is (k // (n-1), j), where j skips the diagonal
+    sources, targets = np.divmod(positions, max(n - 1, 1))
+    targets += targets >= sources
+
+    graph = CSRGraph.from_edges(n, sources, targets)
+    return graph if as_csr else graph.to_networkx()
+
+
+# generate a single graph
+def generate_graph(num_voters, gtype='scale-free', seed=42, params = dict()):
     if 'clique_size' in params.keys():
         assert num_voters % params['clique_size'] == 0, f"Cliques must be of equal size: number of voters must be a multiple \
         of clique_size size. Values passed: num_voters={num_voters}, clique_size={params['clique_size']}"
@@ -33,8 +152,11 @@ def generate_graphs(num_voters, num_graphs, gtype='scale-free', seed=42, params
     if gtype not in gtypes:
         raise NotImplementedError('This graph type has not been implemented.')
 
-    g_func = gtypes[gtype]
+    return gtypes[gtype]()
+
 
+# generate random graphs: the i-th one (from 0) uses seed + i + 1
+def generate_graphs(num_voters, num_graphs, gtype='scale-free', seed=42, params = dict()):
     for i in range(num_graphs):
         seed = seed + 1 if seed is not None else None
-        yield g_func()
+        yield generate_graph(num_voters, gtype, seed, params)
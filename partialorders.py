@@ -1,9 +1,18 @@
+import argparse
 import networkx as nx
+import numpy as np
+import os
 import random
+from collections import OrderedDict
+from math import factorial
 
 
 class PartialOrder:
-    """Class representing a partial order."""
+    """Class representing a partial order.
+
+    Internally, the alternatives are sorted and mapped to bit positions: for every alternative
+    we keep an integer whose bits are its successors in the (transitive) order. The whole order
+    is also packed in a single integer (self.mask), so that comparisons are plain bitwise operations."""
 
     @classmethod
     def generate_from_strict(cls, strict, indecisivness):
@@ -17,9 +26,27 @@ class PartialOrder:
         (PartialOrder): the randomly generated partial order"""
 
 
+        # for few alternatives, the outcome of the process below is precomputed
+        if 2 <= len(strict) <= PosetLattice.MAX_ALTERNATIVES:
+            return PosetLattice.get(len(strict)).sample(strict, indecisivness)
+
+        return cls._remove_edges(strict, indecisivness)
+
+    @classmethod
+    def _remove_edges(cls, strict, indecisivness):
+        """ The process behind generate_from_strict, run step by step (PosetLattice precomputes its outcome).
+
+        Parameters:
+        strict (list(int)): the strict order
+        indecisivness (float): the degree of indecisivness the resulting partial order must have
+
+        Returns:
+        (PartialOrder): the randomly generated partial order"""
+
         # we begin by creating the partial order corresponding to our strict order.
-        order = PartialOrder(strict)
-        graph = dict(order.partial)
+        # all the orders we go through are shared, so their indecisivness is computed only once
+        order = PartialOrder.intern(strict)
+        graph = order.partial
 
         # then, we keep removing edges untill we reach the desired indecisivness
 
@@ -34,7 +61,28 @@ class PartialOrder:
                 tail = random.choice(graph[head])
                 # remove it
                 graph[head].remove(tail)
-                order = PartialOrder(graph)
+                order = PartialOrder.intern(graph)
+
+    @classmethod
+    def intern(cls, inpt):
+        """ Same as PartialOrder(inpt), but returns the instance shared through the process-wide cache
+        (see PartialOrderCache). The returned object must not be modified.
+
+        Parameters:
+        inpt ([dict(int, list(int)), list(int)]): either a partial order, represented as an adjacency list, or a strict order.
+
+        Returns:
+        (PartialOrder): the shared partial order"""
+
+        return ORDER_CACHE.get(inpt)
+
+    @classmethod
+    def _from_closure(cls, alternatives, succ):
+        """ Build the object directly from already transitive successor masks (no validation)."""
+
+        order = cls.__new__(cls)
+        order._setup(alternatives, succ)
+        return order
 
     def __init__(self, inpt):
         """Initialize the object with a partial.
@@ -42,32 +90,217 @@ class PartialOrder:
         Parameters:
         inpt ([dict(int, list(int)), list(int)]): either a partial order, represented as an adjacency list, or a strict order.
         """
+        self._setup(*PartialOrder._parse(inpt))
+
+    @staticmethod
+    def _parse(inpt):
+        """ Turn an adjacency list or a strict order into sorted alternatives + transitive successor masks.
+
+        Parameters:
+        inpt ([dict(int, list(int)), list(int)]): either a partial order, represented as an adjacency list, or a strict order.
+
+        Returns:
+        tuple(int), tuple(int): the alternatives and, for each of them, the bitmask of its successors"""
+
         if isinstance(inpt, dict):
-            partial = inpt
+            alternatives = set(inpt.keys())
+            for successors in inpt.values():
+                alternatives.update(successors)
+            alternatives = tuple(sorted(alternatives))
+            index = {a: i for i, a in enumerate(alternatives)}
+
+            succ = [0] * len(alternatives)
+            for a, successors in inpt.items():
+                for b in successors:
+                    succ[index[a]] |= 1 << index[b]
+
+            # MAKE IT TRANSITIVE
+            return alternatives, PartialOrder._transitive_closure(succ)
         else:
-            # it is a strict order / list. Generate it from here.
-            partial = dict()
-            ll = list(inpt)
-            for a in inpt:
-                ll.remove(a)
-                partial[a] = list(ll)
-
-        # MAKE IT TRANSITIVE
-        G = nx.algorithms.dag.transitive_closure(nx.DiGraph(partial))
-        self.partial = {n: list(G.successors(n)) for n in G.nodes()}
+            # it is a strict order / list: every alternative beats all those after it.
+            # this is already transitive, no need for the closure
+            alternatives = tuple(sorted(inpt))
+            index = {a: i for i, a in enumerate(alternatives)}
+
+            succ = [0] * len(alternatives)
+            below = 0
+            for a in reversed(inpt):
+                succ[index[a]] = below
+                below |= 1 << index[a]
+            return alternatives, tuple(succ)
+
+    def _setup(self, alternatives, succ):
+        """ Initialize the attributes from the (transitive) successor masks"""
+
+        self.alternatives = alternatives
+        self._index = {a: i for i, a in enumerate(alternatives)}
+        self._succ = succ
+        self.mask = PartialOrder._pack(succ)
+
         # will be populated at the first call of get_strict_orders
         self._strict_orders = None
-
-        self.edges = {(i, j) for i in self.partial.keys() for j in self.partial[i]}
+        # will be populated at the first call of _downset_completions
+        self._completions = None
+        self._pred = None
+        # will be populated at the first call of sample_strict_orders
+        self._sampling_table = None
+        # will be populated at the first call of dominance_counts
+        self._dominance = None
 
         # max number of strict orders with this alternatives: will be used in a function
-        factorial = lambda n: 1 if n <= 1 else n * factorial(n-1)
-        self.MAX_STRICT_ORDERS = factorial(len(partial))
+        self.MAX_STRICT_ORDERS = factorial(len(alternatives))
+
+    @staticmethod
+    def _transitive_closure(succ):
+        """ Bitwise Warshall: close a list of successor masks under transitivity.
+
+        Parameters:
+        succ (list(int)): per alternative index, the bitmask of its successors
+
+        Returns:
+        tuple(int): the transitive successor masks"""
+
+        succ = list(succ)
+        for k in range(len(succ)):
+            bit = 1 << k
+            for i in range(len(succ)):
+                if succ[i] & bit:
+                    succ[i] |= succ[k]
+
+        if any(s >> i & 1 for i, s in enumerate(succ)):
+            raise ValueError('The given graph contains a cycle: it is not a partial order.')
+
+        return tuple(succ)
+
+    @staticmethod
+    def _pack(succ):
+        """ Pack the successor masks into a single integer (row i occupies bits i*m ... i*m + m - 1)"""
+
+        m = len(succ)
+        mask = 0
+        for i, s in enumerate(succ):
+            mask |= s << (i * m)
+        return mask
 
     def __repr__(self):
         """`to string` method"""
         return str(self.partial)
 
+    def __eq__(self, other):
+        return isinstance(other, PartialOrder) and self.mask == other.mask and self.alternatives == other.alternatives
+
+    def __hash__(self):
+        return hash((self.alternatives, self.mask))
+
+    @property
+    def partial(self):
+        """ The partial order as an adjacency list (built on demand, it is a fresh copy every time).
+
+        Returns:
+        dict(int, list(int)): mapping from an alternative to all the alternatives it beats"""
+
+        return {a: [b for j, b in enumerate(self.alternatives) if s >> j & 1]
+                for a, s in zip(self.alternatives, self._succ)}
+
+    @property
+    def edges(self):
+        """ The (transitive) set of edges of the order (built on demand).
+
+        Returns:
+        set(tuple(int, int)): pairs (i, j) such that i beats j"""
+
+        return {(i, j) for i, successors in self.partial.items() for j in successors}
+
+    def is_consistent(self, strict):
+        """ Check whether a strict order is one of the linear extensions of self, in O(m^2)
+        without enumerating them.
+
+        Parameters:
+        strict (list(int)): a strict order
+
+        Returns:
+        (bool): the verdict"""
+
+        if len(strict) != len(self.alternatives):
+            return False
+
+        # walk the order: nobody already placed can be a successor of the current alternative
+        seen = 0
+        for a in strict:
+            i = self._index.get(a)
+            if i is None or (seen >> i & 1) or (self._succ[i] & seen):
+                return False
+            seen |= 1 << i
+
+        return True
+
+    def _downset_completions(self):
+        """ Dynamic programming over the downsets of the order. A downset is a set of alternatives
+        (as a bitmask) closed under predecessors: exactly the sets that can form the top of a linear extension.
+        For every downset we count in how many ways it can be completed into a full linear extension.
+        Runs in O(2^m * m) at worst, but only the downsets that actually exist are visited.
+
+        Returns:
+        dict(int, int): mapping from a downset to its number of completions"""
+
+        if self._completions is None:
+            m = len(self.alternatives)
+            pred = self._pred = self._predecessors()
+
+            # forward pass: all downsets, layer by layer (by size)
+            layers = [[0]]
+            for _ in range(m):
+                layer = set()
+                for downset in layers[-1]:
+                    for j in self._available(downset, pred):
+                        layer.add(downset | 1 << j)
+                layers.append(list(layer))
+
+            # backward pass: the full set has a single completion (the empty one)
+            completions = {(1 << m) - 1: 1}
+            for layer in reversed(layers[:-1]):
+                for downset in layer:
+                    completions[downset] = sum(completions[downset | 1 << j] for j in self._available(downset, pred))
+
+            self._completions = completions
+
+        return self._completions
+
+    def _predecessors(self):
+        """ Per alternative index, the bitmask of the alternatives that beat it"""
+
+        pred = [0] * len(self.alternatives)
+        for i, s in enumerate(self._succ):
+            for j in range(len(self.alternatives)):
+                if s >> j & 1:
+                    pred[j] |= 1 << i
+        return pred
+
+    @staticmethod
+    def _available(downset, pred):
+        """ Alternatives (indexes) that can come right after the given downset"""
+
+        return [j for j, p in enumerate(pred) if not downset >> j & 1 and (p & downset) == p]
+
+    def dominance_counts(self):
+        """ For every alternative (in the order of self.alternatives), how many alternatives beat it.
+
+        Returns:
+        np.array(int): the counts """
+
+        if self._dominance is None:
+            pred = self._predecessors() if self._pred is None else self._pred
+            self._dominance = np.array([bin(p).count('1') for p in pred], dtype=np.int64)
+        return self._dominance
+
+    def count_linear_extensions(self):
+        """ Count the strict orders consistent with self, without enumerating them.
+
+        Returns:
+        (int): the number of linear extensions"""
+
+        return self._downset_completions()[0]
+
     def get_strict_orders(self):
         """given a partial order, return all the strict orders consistent with it
 
@@ -86,6 +319,7 @@ class PartialOrder:
 
     def issuperset(self, other):
         """ Check whether this partial order is a STRICT superset of another.
+        Both orders must be defined over the same alternatives.
 
         Parameters:
         other (PartialOrder): another partial order.
@@ -96,7 +330,7 @@ class PartialOrder:
         # note: everything is transitive
         # check whether it is a superset
 
-        return (self.edges != other.edges) and self.edges.issuperset(other.edges)
+        return (self.mask != other.mask) and (self.mask & other.mask) == other.mask
 
     # this might not be a good score
     def compute_indecisivness(self):
@@ -105,7 +339,7 @@ class PartialOrder:
         Returns:
         (float): the score"""
 
-        return (len(self.get_strict_orders()) - 1) / (self.MAX_STRICT_ORDERS - 1)
+        return (self.count_linear_extensions() - 1) / (self.MAX_STRICT_ORDERS - 1)
 
     def random_strict_order(self):
         """ Return a random strict order consistent with the partial order represented by self
@@ -113,4 +347,373 @@ class PartialOrder:
         Returns:
         (list(int)): a strict order"""
 
-        return random.choice(self.get_strict_orders())
+        # draw the index of the linear extension, then walk the downsets: every alternative
+        # that can come next owns a block of indexes as large as its number of completions
+        completions = self._downset_completions()
+        r = random.randrange(completions[0])
+
+        order = []
+        downset = 0
+        for _ in self.alternatives:
+            for j in self._available(downset, self._pred):
+                c = completions[downset | 1 << j]
+                if r < c:
+                    break
+                r -= c
+            order.append(self.alternatives[j])
+            downset |= 1 << j
+
+        return order
+
+    def _build_sampling_table(self):
+        """ Dense version of the downset DP, used by the batched sampler.
+
+        Returns:
+        np.array(int), np.array(int): per downset id and alternative index, the cumulative number of
+        completions of the alternatives up to that index and the id of the downset obtained by adding it"""
+
+        if self._sampling_table is None:
+            m = len(self.alternatives)
+            completions = self._downset_completions()
+            ids = {downset: i for i, downset in enumerate(completions)}
+
+            cumulative = np.zeros((len(ids), m), dtype=np.int64)
+            following = np.zeros((len(ids), m), dtype=np.int64)
+            for downset, i in ids.items():
+                available = set(self._available(downset, self._pred))
+                total = 0
+                for j in range(m):
+                    if j in available:
+                        total += completions[downset | 1 << j]
+                        following[i, j] = ids[downset | 1 << j]
+                    cumulative[i, j] = total
+
+            self._sampling_table = ids[0], cumulative, following
+
+        return self._sampling_table
+
+    def sample_strict_orders(self, k, rng=None):
+        """ Draw k strict orders consistent with self, uniformly and independently, all at once.
+
+        Parameters:
+        k (int): how many orders to draw
+        rng (np.random.Generator): source of randomness. If None, one is seeded from the `random` module
+
+        Returns:
+        np.array(uint8): a (k, m) array, one strict order per row"""
+
+        assert self.count_linear_extensions() < 2**63, 'Too many linear extensions for the batched sampler.'
+        rng = np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+
+        start, cumulative, following = self._build_sampling_table()
+        labels = np.array(self.alternatives, dtype=np.uint8)
+        rows = np.arange(k)
+
+        # same walk as random_strict_order, one step for all the samples at once
+        r = rng.integers(0, self.count_linear_extensions(), size=k, dtype=np.int64)
+        state = np.full(k, start)
+        orders = np.empty((k, len(self.alternatives)), dtype=np.uint8)
+        for step in range(len(self.alternatives)):
+            blocks = cumulative[state]
+            j = (blocks <= r[:, None]).sum(axis=1)
+            r -= np.where(j > 0, blocks[rows, j - 1], 0)
+            orders[:, step] = labels[j]
+            state = following[state, j]
+
+        return orders
+
+
+
+class PartialOrderCache:
+    """Bounded LRU registry of shared PartialOrder objects, keyed by their (transitive) edge set.
+
+    Populations contain few distinct partial orders, so everything derived from them (closure,
+    linear extensions, indecisivness, sampling tables) is computed once per distinct order."""
+
+    def __init__(self, maxsize=2**16):
+        """ Parameters:
+        maxsize (int): how many partial orders to keep; the least recently used are evicted first """
+
+        self.maxsize = maxsize
+        self._orders = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, inpt):
+        """ Return the shared partial order corresponding to the input, building it if needed.
+
+        Parameters:
+        inpt ([dict(int, list(int)), list(int)]): either a partial order, represented as an adjacency list, or a strict order.
+
+        Returns:
+        (PartialOrder): the shared partial order"""
+
+        return self.get_closed(*PartialOrder._parse(inpt))
+
+    def get_closed(self, alternatives, succ):
+        """ Same as get, from the sorted alternatives and their transitive successor masks.
+
+        Parameters:
+        alternatives (tuple(int)): sorted alternatives
+        succ (tuple(int)): per alternative, the bitmask of its successors (already transitive)
+
+        Returns:
+        (PartialOrder): the shared partial order"""
+
+        key = (alternatives, PartialOrder._pack(succ))
+
+        order = self._orders.get(key)
+        if order is not None:
+            self.hits += 1
+            self._orders.move_to_end(key)
+            return order
+
+        self.misses += 1
+        order = PartialOrder._from_closure(alternatives, succ)
+        self._orders[key] = order
+        if len(self._orders) > self.maxsize:
+            self._orders.popitem(last=False)
+            self.evictions += 1
+
+        return order
+
+    def clear(self):
+        """ Drop all the cached orders and reset the counters """
+
+        self._orders.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """ Returns:
+        dict(str, int): hits, misses, evictions and current size of the cache """
+
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._orders)}
+
+    def __len__(self):
+        return len(self._orders)
+
+
+# process-wide cache used by PartialOrder.intern
+ORDER_CACHE = PartialOrderCache()
+
+
+class PosetLattice:
+    """All the partial orders that PartialOrder.generate_from_strict can reach from a strict order
+    over m alternatives, expressed over positions (0 is the top of the strict order, and so on).
+
+    generate_from_strict keeps removing a random edge (random head, then random tail) from the strict order
+    until the indecisivness is high enough. Here every edge subset of the strict order is a state of
+    that process: given the target indecisivness, we compute once the probability of stopping at every
+    partial order, so sampling a voter is a single draw plus a relabelling of the positions."""
+
+    # the number of states is 2^(m(m-1)/2): beyond this, generate_from_strict runs the process itself
+    MAX_ALTERNATIVES = 6
+    # where the tables are stored between runs (next to this file, wherever the scripts are run from)
+    CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+    # bump when the format (or the content) of the stored tables changes: older files are ignored
+    VERSION = 1
+
+    # m -> PosetLattice, populated lazily
+    _lattices = dict()
+
+    @classmethod
+    def get(cls, m):
+        """ Return the lattice for m alternatives: from memory, from disk or built from scratch.
+
+        Parameters:
+        m (int): number of alternatives
+
+        Returns:
+        (PosetLattice): the lattice"""
+
+        if m not in cls._lattices:
+            path = os.path.join(cls.CACHE_DIR, f'poset_lattice_v{cls.VERSION}_m{m}.npz')
+            lattice = cls._load(path, m)
+            if lattice is None:
+                lattice = cls.build(m)
+                try:
+                    os.makedirs(cls.CACHE_DIR, exist_ok=True)
+                    # write and rename, so concurrent runs never read a partial file
+                    tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+                    np.savez(tmp_path, version=cls.VERSION, m=m, state_posets=lattice.state_posets,
+                             masks=np.array(lattice.masks, dtype=np.uint64), counts=np.array(lattice.counts, dtype=np.int64))
+                    os.replace(tmp_path, path)
+                except OSError:
+                    # the cache is just an optimization
+                    pass
+
+            cls._lattices[m] = lattice
+
+        return cls._lattices[m]
+
+    @classmethod
+    def _load(cls, path, m):
+        """ The lattice stored in path, or None if there is none (or it was written by another version) """
+
+        try:
+            with np.load(path) as table:
+                if int(table['version']) != cls.VERSION or int(table['m']) != m:
+                    return None
+                lattice = cls(m, table['state_posets'], [int(x) for x in table['masks']], [int(x) for x in table['counts']])
+        except (OSError, KeyError, ValueError):
+            return None
+
+        if len(lattice.state_posets) != 1 << (m * (m - 1) // 2) or len(lattice.masks) != len(lattice.counts):
+            return None
+        return lattice
+
+    @classmethod
+    def build(cls, m):
+        """ Enumerate all the edge subsets of the strict order 0 > 1 > ... > m-1 and their partial orders.
+
+        Parameters:
+        m (int): number of alternatives
+
+        Returns:
+        (PosetLattice): the lattice"""
+
+        edges = [(i, j) for i in range(m) for j in range(i + 1, m)]
+        positions = tuple(range(m))
+
+        state_posets = np.empty(1 << len(edges), dtype=np.int32)
+        poset_ids = dict()
+        masks, counts = [], []
+
+        for state in range(1 << len(edges)):
+            succ = [0] * m
+            for e, (i, j) in enumerate(edges):
+                if state >> e & 1:
+                    succ[i] |= 1 << j
+            succ = PartialOrder._transitive_closure(succ)
+            mask = PartialOrder._pack(succ)
+
+            if mask not in poset_ids:
+                poset_ids[mask] = len(masks)
+                masks.append(mask)
+                counts.append(PartialOrder._from_closure(positions, succ).count_linear_extensions())
+            state_posets[state] = poset_ids[mask]
+
+        return cls(m, state_posets, masks, counts)
+
+    def __init__(self, m, state_posets, masks, counts):
+        """ Parameters:
+        m (int): number of alternatives
+        state_posets (np.array(int)): for every edge subset of the strict order, the id of its partial order
+        masks (list(int)): per partial order id, its packed (transitive) successor masks over positions
+        counts (list(int)): per partial order id, its number of linear extensions """
+
+        self.m = m
+        self.state_posets = state_posets
+        self.masks = masks
+        self.counts = counts
+
+        self._edges = [(i, j) for i in range(m) for j in range(i + 1, m)]
+        # target indecisivness -> (partial order ids, cumulative probabilities)
+        self._distributions = dict()
+
+    @property
+    def levels(self):
+        """ Returns:
+        list(float): per partial order id, its indecisivness """
+
+        return [(count - 1) / (factorial(self.m) - 1) for count in self.counts]
+
+    def distribution(self, indecisivness):
+        """ Probability that generate_from_strict stops at each partial order, for a given target.
+
+        Parameters:
+        indecisivness (float): the target indecisivness
+
+        Returns:
+        list(int), list(float): partial order ids and their cumulative probabilities"""
+
+        if indecisivness not in self._distributions:
+            stops = [level >= indecisivness for level in self.levels]
+
+            # the edges each head can drop
+            head_edges = [[e for e, (i, _) in enumerate(self._edges) if i == head] for head in range(self.m)]
+
+            # probability mass of the states, by number of edges left (edges are only removed)
+            layers = [dict() for _ in range(len(self._edges) + 1)]
+            layers[-1][(1 << len(self._edges)) - 1] = 1.
+            result = dict()
+
+            for layer in reversed(layers):
+                for state, mass in layer.items():
+                    poset = int(self.state_posets[state])
+                    if stops[poset]:
+                        result[poset] = result.get(poset, 0.) + mass
+                        continue
+
+                    heads = [[e for e in es if state >> e & 1] for es in head_edges]
+                    heads = [es for es in heads if es]
+                    if not heads:
+                        raise ValueError(f'Indecisivness {indecisivness} cannot be reached with {self.m} alternatives.')
+
+                    for es in heads:
+                        share = mass / len(heads) / len(es)
+                        following = layers[bin(state).count('1') - 1]
+                        for e in es:
+                            following[state & ~(1 << e)] = following.get(state & ~(1 << e), 0.) + share
+
+            posets = sorted(result)
+            cumulative = list(np.cumsum([result[poset] for poset in posets]))
+            self._distributions[indecisivness] = posets, cumulative
+
+        return self._distributions[indecisivness]
+
+    def sample(self, strict, indecisivness):
+        """ Same as PartialOrder.generate_from_strict, with a single draw.
+
+        Parameters:
+        strict (list(int)): the strict order
+        indecisivness (float): the degree of indecisivness the resulting partial order must have
+
+        Returns:
+        (PartialOrder): the (shared) randomly generated partial order"""
+
+        posets, cumulative = self.distribution(indecisivness)
+        mask = self.masks[random.choices(posets, cum_weights=cumulative)[0]]
+
+        # relabel: position p is the alternative strict[p]
+        alternatives = tuple(sorted(strict))
+        index = {a: i for i, a in enumerate(alternatives)}
+        bits = [1 << index[a] for a in strict]
+
+        row = (1 << self.m) - 1
+        succ = [0] * self.m
+        for p in range(self.m):
+            below = mask >> (p * self.m) & row
+            for q in range(p + 1, self.m):
+                if below >> q & 1:
+                    succ[index[strict[p]]] |= bits[q]
+
+        return ORDER_CACHE.get_closed(alternatives, tuple(succ))
+
+
+if __name__ == "__main__":
+    # Check: PosetLattice.sample must follow the same distribution as the step by step process
+    from scipy.stats import chi2_contingency
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--alternatives', type=int, default=4, help='Number of alternatives')
+    parser.add_argument('--draws', type=int, default=40000, help='Draws per method and indecisiveness')
+    parser.add_argument('--indecisiveness', type=float, nargs='+', default=[0.1, 0.3, 0.47, 1], help='Targets to check')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    strict = list(range(1, args.alternatives + 1))
+    lattice = PosetLattice.get(args.alternatives)
+
+    for indecisivness in args.indecisiveness:
+        sampled = [lattice.sample(strict, indecisivness).mask for _ in range(args.draws)]
+        reference = [PartialOrder._remove_edges(strict, indecisivness).mask for _ in range(args.draws)]
+
+        posets = sorted(set(sampled) | set(reference))
+        table = np.array([[sampled.count(p) for p in posets], [reference.count(p) for p in posets]])
+        difference = np.abs(table[0] - table[1]).max() / args.draws
+        p = chi2_contingency(table)[1] if len(posets) > 1 else 1.
+        print(f'indecisiveness {indecisivness}: {len(posets)} partial orders, '
+              f'largest difference in frequency {difference:.4f}, chi-square p-value {p:.3f}')
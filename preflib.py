@@ -0,0 +1,128 @@
+import mmap
+import os
+import numpy as np
+
+
+class PrefLibReader:
+    """Reader of PrefLib election files (.soc, .soi, .toc), without eval and without loading the whole file:
+    the ballot lines are read in chunks (over a memory map of the file) and every chunk is converted to
+    integers at once.
+
+    Both the classic layout (number of alternatives, one 'i,name' line per alternative, a 'voters,sum,unique'
+    line, then 'count,a,b,c' lines) and the newer one ('# KEY: value' metadata lines, then 'count: a,b,c'
+    lines) are supported. Ties ('{a,b}', in .toc files) are read as consecutive positions, marked in the
+    ties array."""
+
+    def __init__(self, path, chunk_bytes=2**24):
+        """ Parameters:
+        path (str): the PrefLib file
+        chunk_bytes (int): (approximate) size of the chunks of ballot lines """
+
+        if not os.path.exists(path):
+            raise ValueError(f'PrefLib file {path} does not exist')
+
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.alternatives = dict()
+        self._read_header()
+
+    def _read_header(self):
+        """ Read the number and names of the alternatives, and where the ballots start """
+
+        with open(self.path, 'rb') as f:
+            first = f.readline()
+
+            if first.startswith(b'#'):
+                # newer layout: metadata lines start with #
+                line = first
+                while line.startswith(b'#'):
+                    key, _, value = line[1:].decode().partition(':')
+                    key = key.strip()
+                    if key == 'NUMBER ALTERNATIVES':
+                        self.num_alternatives = int(value)
+                    elif key.startswith('ALTERNATIVE NAME'):
+                        self.alternatives[int(key.split()[-1])] = value.strip()
+                    self._ballots_start = f.tell()
+                    line = f.readline()
+            else:
+                self.num_alternatives = int(first)
+                for _ in range(self.num_alternatives):
+                    number, _, name = f.readline().decode().partition(',')
+                    self.alternatives[int(number)] = name.strip()
+                # voters, sum of the counts, unique ballots
+                f.readline()
+                self._ballots_start = f.tell()
+
+    def _blocks(self):
+        """ Yield blocks of whole ballot lines, of about chunk_bytes each """
+
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= self._ballots_start:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = self._ballots_start
+                while start < size:
+                    end = min(start + self.chunk_bytes, size)
+                    # cut after the last newline of the block (if any)
+                    if end < size:
+                        newline = data.rfind(b'\n', start, end)
+                        end = newline + 1 if newline >= start else data.find(b'\n', end) + 1 or size
+                    yield data[start:end]
+                    start = end
+
+    def iter_chunks(self):
+        """ Iterate over the ballot lines, a chunk at a time.
+
+        Yields:
+        np.array(int64), np.array(int64), np.array(bool): counts (k,), ballots (k, m) with the alternatives
+        in order (0 after the last ranked alternative, for incomplete orders), and ties (k, m): whether
+        every position is tied with the previous one """
+
+        m = self.num_alternatives
+        for block in self._blocks():
+            # newer layout: 'count: a,b,c'
+            lines = [line for line in block.replace(b':', b',').split(b'\n') if line.strip()]
+            if not lines:
+                continue
+
+            # every line is: count, then `length` alternatives
+            lengths = np.array([line.count(b',') for line in lines], dtype=np.int64)
+            tokens = np.char.strip(np.array(b','.join(lines).split(b',')), b' \t\r')
+
+            # ties: a token is tied with the previous one if a group ({...}) is open before it
+            opens = np.char.startswith(tokens, b'{').astype(np.int64)
+            closes = np.char.endswith(tokens, b'}').astype(np.int64)
+            tied = np.cumsum(opens - closes) - (opens - closes) > 0
+
+            values = np.char.strip(tokens, b'{}').astype(np.int64)
+
+            line_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+            counts = values[line_starts]
+
+            # the alternatives of line i go to row i, columns 0, ..., lengths[i]-1
+            is_alternative = np.ones(len(tokens), dtype=bool)
+            is_alternative[line_starts] = False
+            rows = np.repeat(np.arange(len(lines)), lengths)
+            columns = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+            ballots = np.zeros((len(lines), m), dtype=np.int64)
+            ballots[rows, columns] = values[is_alternative]
+            ties = np.zeros((len(lines), m), dtype=bool)
+            ties[rows, columns] = tied[is_alternative]
+
+            yield counts, ballots, ties
+
+    def read(self):
+        """ Read all the ballot lines.
+
+        Returns:
+        np.array(int64), np.array(int64), np.array(bool): counts (n,), ballots (n, m) and ties (n, m) (see iter_chunks) """
+
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            m = self.num_alternatives
+            return np.empty(0, dtype=np.int64), np.empty((0, m), dtype=np.int64), np.empty((0, m), dtype=bool)
+        counts, ballots, ties = zip(*chunks)
+        return np.concatenate(counts), np.concatenate(ballots), np.concatenate(ties)
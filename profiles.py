@@ -0,0 +1,125 @@
+import numpy as np
+
+# not computed yet (None is a valid Condorcet winner: there is none)
+_UNKNOWN = object()
+
+
+class Profile:
+    """A profile: ballots and how many voters submitted each of them.
+
+    Statistics (majority matrix, position histogram, scores...) are computed lazily and cached,
+    so that every voting rule run on the same profile reads them from here.
+
+    The counts can also be a (n_profiles, n_ballots) matrix: then every row is a profile over
+    the same ballots, and every statistic gets a leading n_profiles axis."""
+
+    def __init__(self, preferences, counts, candidates=None):
+        """ Parameters:
+        preferences (list(list(int))): ballots
+        counts ([list(int), np.array(int)]): one per ballot: how many people submitted that ballot (or a matrix, see above)
+        candidates (list(int)): order of the candidates in all the statistics. By default, the sorted candidates of the first ballot """
+
+        self.candidates = sorted(preferences[0]) if candidates is None else list(candidates)
+        index = {c: i for i, c in enumerate(self.candidates)}
+
+        # positions[b, c]: position of the c-th candidate in ballot b (0 is the top)
+        ballots = np.array([[index[c] for c in ballot] for ballot in preferences], dtype=np.int64)
+        self.positions = np.empty_like(ballots)
+        np.put_along_axis(self.positions, ballots, np.arange(len(self.candidates)), axis=1)
+
+        self.counts = np.asarray(counts, dtype=np.int64)
+        assert self.counts.shape[-1] == len(self.positions), 'One count per ballot is needed.'
+
+        self._majority = None
+        self._position_histogram = None
+        self._plurality_scores = None
+        self._borda_scores = None
+        self._copeland_scores = None
+        self._condorcet_winner = _UNKNOWN
+        self._condorcet_loser = _UNKNOWN
+
+    @property
+    def num_candidates(self):
+        return len(self.candidates)
+
+    @property
+    def num_voters(self):
+        """ int (or np.array(int), one per profile): total number of voters """
+        return self.counts.sum(axis=-1)
+
+    @property
+    def majority(self):
+        """ Weighted majority matrix: majority[i, j] is the number of voters ranking candidate i over candidate j.
+
+        Returns:
+        np.array(int): (m, m) matrix, or (n_profiles, m, m) """
+
+        if self._majority is None:
+            m = self.num_candidates
+            beats = (self.positions[:, :, None] < self.positions[:, None, :]).reshape(len(self.positions), m * m)
+            self._majority = (self.counts @ beats.astype(np.int64)).reshape(self.counts.shape[:-1] + (m, m))
+
+        return self._majority
+
+    @property
+    def position_histogram(self):
+        """ histogram[i, p] is the number of voters ranking candidate i in position p.
+
+        Returns:
+        np.array(int): (m, m) matrix, or (n_profiles, m, m) """
+
+        if self._position_histogram is None:
+            m = self.num_candidates
+            onehot = (self.positions[:, :, None] == np.arange(m)).reshape(len(self.positions), m * m)
+            self._position_histogram = (self.counts @ onehot.astype(np.int64)).reshape(self.counts.shape[:-1] + (m, m))
+
+        return self._position_histogram
+
+    @property
+    def plurality_scores(self):
+        if self._plurality_scores is None:
+            self._plurality_scores = self.position_histogram[..., 0]
+        return self._plurality_scores
+
+    @property
+    def borda_scores(self):
+        if self._borda_scores is None:
+            self._borda_scores = self.position_histogram @ np.arange(self.num_candidates - 1, -1, -1)
+        return self._borda_scores
+
+    @property
+    def copeland_scores(self):
+        if self._copeland_scores is None:
+            # +1 for every pairwise victory, -1 for every pairwise defeat
+            self._copeland_scores = np.sign(self.majority - np.swapaxes(self.majority, -1, -2)).sum(axis=-1)
+        return self._copeland_scores
+
+    @property
+    def condorcet_winner(self):
+        """ The candidate beating every other one in pairwise majority contests, if any.
+
+        Returns:
+        [int, NoneType]: the Condorcet winner (or a list of them, one per profile) """
+
+        if self._condorcet_winner is _UNKNOWN:
+            self._condorcet_winner = self._condorcet(self.majority > np.swapaxes(self.majority, -1, -2))
+        return self._condorcet_winner
+
+    @property
+    def condorcet_loser(self):
+        """ The candidate losing against every other one in pairwise majority contests, if any.
+
+        Returns:
+        [int, NoneType]: the Condorcet loser (or a list of them, one per profile) """
+
+        if self._condorcet_loser is _UNKNOWN:
+            self._condorcet_loser = self._condorcet(self.majority < np.swapaxes(self.majority, -1, -2))
+        return self._condorcet_loser
+
+    def _condorcet(self, wins):
+        """ The candidate whose row in wins is all True (but the diagonal), if any """
+
+        found = wins.sum(axis=-1) == self.num_candidates - 1
+        if found.ndim == 1:
+            return self.candidates[int(found.argmax())] if found.any() else None
+        return [self.candidates[int(row.argmax())] if row.any() else None for row in found]
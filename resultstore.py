@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import numpy as np
+
+
+class ResultWriter:
+    """Streams the records of a sweep (one per election, paradigm and rule) to a directory of columnar shards:
+    every shard is a directory with one .npy file per column, and manifest.json lists the shards, the columns
+    and the categories of the categorical columns. Records are buffered and flushed every flush_every rows,
+    so memory stays flat however long the sweep is; the manifest is rewritten (atomically) after every flush,
+    so an interrupted sweep can still be loaded."""
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, columns, categories, metadata=None, flush_every=2**16):
+        """ Parameters:
+        directory (str): where to write: a new or empty directory, or the directory of earlier results
+            (which are replaced). Any other directory is refused
+        columns (dict(str, str)): name and numpy dtype of every column
+        categories (dict(str, list(str))): for categorical columns, the name of every code
+        metadata (dict): anything JSON-serializable to keep with the results (e.g. the config)
+        flush_every (int): rows per shard """
+
+        self.directory = directory
+        self.columns = dict(columns)
+        self.categories = {name: list(values) for name, values in categories.items()}
+        self.metadata = metadata
+        self.flush_every = flush_every
+
+        if os.path.isdir(directory) and os.listdir(directory):
+            # only ever delete what a writer wrote
+            if not os.path.isfile(os.path.join(directory, self.MANIFEST)):
+                raise ValueError(f'{directory} is not empty and does not hold results: not overwriting it')
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = {name: [] for name in self.columns}
+        self._buffered = 0
+        self._shards = []
+        self._write_manifest(complete=False)
+
+    def code(self, column, value):
+        """ int: the code of a value of a categorical column """
+        return self.categories[column].index(value)
+
+    def append(self, **columns):
+        """ Append a batch of records: one array (or scalar, repeated) per column, all of the same length """
+
+        lengths = {len(value) for value in columns.values() if np.ndim(value) > 0}
+        assert len(lengths) == 1, 'All the columns of a batch must have the same length'
+        assert set(columns) == set(self.columns), f'Expected the columns {sorted(self.columns)}'
+        rows = lengths.pop()
+
+        for name, value in columns.items():
+            self._buffer[name].append(np.broadcast_to(np.asarray(value, dtype=self.columns[name]), (rows,)))
+        self._buffered += rows
+
+        if self._buffered >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered records as a new shard """
+
+        if self._buffered == 0:
+            return
+
+        shard = f'shard-{len(self._shards):05d}'
+        os.makedirs(os.path.join(self.directory, shard))
+        for name, chunks in self._buffer.items():
+            np.save(os.path.join(self.directory, shard, f'{name}.npy'), np.concatenate(chunks))
+
+        self._shards.append({'name': shard, 'rows': self._buffered})
+        self._buffer = {name: [] for name in self.columns}
+        self._buffered = 0
+        self._write_manifest(complete=False)
+
+    def close(self):
+        self.flush()
+        self._write_manifest(complete=True)
+
+    def _write_manifest(self, complete):
+        manifest = {
+            'columns': self.columns,
+            'categories': self.categories,
+            'shards': self._shards,
+            'metadata': self.metadata,
+            'complete': complete,
+        }
+
+        # write a temporary file, then rename it: readers never see half a manifest
+        path = os.path.join(self.directory, self.MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultStore:
+    """Reads the results written by a ResultWriter. Columns are memory-mapped: nothing is loaded
+    until it is used."""
+
+    def __init__(self, directory):
+        """ Parameters:
+        directory (str): the directory of a ResultWriter """
+
+        self.directory = directory
+        with open(os.path.join(directory, ResultWriter.MANIFEST), 'r') as f:
+            manifest = json.load(f)
+
+        self.columns = manifest['columns']
+        self.categories = manifest['categories']
+        self.metadata = manifest['metadata']
+        self.complete = manifest['complete']
+        self._shards = manifest['shards']
+
+    def __len__(self):
+        return sum(shard['rows'] for shard in self._shards)
+
+    def shards(self, name):
+        """ Iterate over the shards of a column, as memory-mapped arrays
+
+        Parameters:
+        name (str): the column """
+
+        for shard in self.iter_shards([name]):
+            yield shard[name]
+
+    def column(self, name):
+        """ Parameters:
+        name (str): the column
+
+        Returns:
+        np.array: the whole column (memory-mapped if there is a single shard) """
+
+        shards = list(self.shards(name))
+        if len(shards) == 1:
+            return shards[0]
+        if not shards:
+            return np.empty(0, dtype=self.columns[name])
+        return np.concatenate(shards)
+
+    def code(self, column, value):
+        """ int: the code of a value of a categorical column """
+        return self.categories[column].index(value)
+
+    def select(self, **values):
+        """ Mask of the records matching all the given values (category names for categorical columns)
+
+        Returns:
+        np.array(bool): one per record """
+
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in values.items():
+            if name in self.categories:
+                value = self.code(name, value)
+            mask &= self.column(name) == value
+        return mask
+
+    def iter_shards(self, names):
+        """ Iterate over the shards, as dicts of memory-mapped columns
+
+        Parameters:
+        names (list(str)): the columns to read """
+
+        for shard in self._shards:
+            yield {name: np.load(os.path.join(self.directory, shard['name'], f'{name}.npy'), mmap_mode='r') for name in names}
@@ -1,8 +1,9 @@
 from partialorders import PartialOrder
 from voter import Voter
-from networks import generate_graphs
+from networks import generate_graphs, CSRGraph
+from ballots import BallotCodec
+from utils import PartialRegretTable
 import random
-from collections import Counter
 import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
@@ -29,15 +30,16 @@ class SocialNetwork:
 
         Parameters:
         strategy (str): generation strategy of the graph
-        print_graph (bool): whether to print the graph just created """
+        print_graph (bool): whether to print the graph just created
+        graph ([nx.DiGraph, dict(int, list(int)), CSRGraph]): who can delegate to whom (stored as a CSRGraph) """
 
         if strategy == 'from_voter_graph':
-            assert isinstance(id2voter, dict) and (isinstance(graph, dict) or isinstance(graph, nx.DiGraph))
+            assert isinstance(id2voter, dict) and isinstance(graph, (dict, nx.DiGraph, CSRGraph))
             self.id2voter = id2voter
-            self.graph = nx.DiGraph(graph) if isinstance(graph, dict) else graph
+            self.graph = graph
 
         elif strategy == 'dataset_and_nx_graph':
-            assert isinstance(graph, nx.DiGraph), "Under dataset_and_nx_graph strategy, graph parameter must be a networkx.DiGraph"
+            assert isinstance(graph, (nx.DiGraph, CSRGraph)), "Under dataset_and_nx_graph strategy, graph parameter must be a networkx.DiGraph (or a CSRGraph)"
             self.id2voter = SocialNetwork._convert_dataset_into_id2voter(dataset, possible_indecision_levels)
             self.graph = graph
 
@@ -48,10 +50,54 @@ class SocialNetwork:
         else:
             raise NotImplementedError("This graph-creation strategy does not exist.")
 
+        # voters are indexed by position in the delegation arrays
+        assert sorted(self.id2voter.keys()) == list(range(len(self.id2voter))), 'Voter ids must be 0, 1, ..., n-1'
+        assert self.graph.num_nodes == len(self.id2voter), 'The graph must have one node per voter'
+
         if print_graph:
-            nx.draw(self.graph, with_labels=True, font_weight='bold')
+            # networkx is only needed to draw
+            nx.draw(self.graph.to_networkx(), with_labels=True, font_weight='bold')
             plt.show()
 
+    @property
+    def id2voter(self):
+        """ dict(int, Voter): the voters, by id """
+        return self._id2voter
+
+    @id2voter.setter
+    def id2voter(self, id2voter):
+        self._id2voter = id2voter
+        self.invalidate_caches()
+
+    @property
+    def graph(self):
+        """ CSRGraph: who can delegate to whom """
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        # any graph is converted once into (immutable) arrays
+        self._graph = CSRGraph.from_graph(graph)
+        self.invalidate_caches()
+
+    def invalidate_caches(self):
+        """ Forget everything computed so far from voters and graph (delegation candidates, partial orders,
+        dominance counts). Assigning id2voter or graph does it automatically; call it explicitly after
+        modifying them in place. """
+
+        self._candidates = None
+        self._posets = None
+        self._poset_table = None
+        self._partial_regret_table = None
+
+    @property
+    def partial_regret_table(self):
+        """ PartialRegretTable: partial regret of every alternative for this population (computed once) """
+
+        if self._partial_regret_table is None:
+            self._partial_regret_table = PartialRegretTable(self.id2voter.values())
+        return self._partial_regret_table
+
     def getNeighbours(self, voter_id):
         """ Returns a list of neighbours for a voter
 
@@ -61,158 +107,209 @@ class SocialNetwork:
         Returns:
         list(int): its neighbours """
 
-        return list(self.graph.successors(voter_id))
+        return self.graph.successors(voter_id).tolist()
+
+    def _delegation_candidates(self, paradigm):
+        """ For every voter, the voters it may delegate to under a paradigm. Graph and voters are fixed,
+        so this is computed once (for both paradigms) and only the random pick is redone at every election.
+
+        A voter may delegate to the neighbours whose partial order is a strict superset of its own, and among
+        them to the least indecisive ones: the superset test runs once per pair of distinct partial orders met
+        on an edge, and the choice is a masked minimum over the edges of the graph, for all the voters at once.
+
+        Parameters:
+        paradigm (str): liquid or proxy
+
+        Returns:
+        np.array(int64), np.array(int32): CSR-like table: the candidates of voter i are indices[indptr[i]:indptr[i+1]] """
+
+        if self._candidates is None:
+            n_voters = len(self.id2voter)
+            _, poset_of = self._voter_posets()
+            _, indecision, decisive = self._posets_table()
+
+            # every edge, from voter to neighbour (in the order of the neighbours)
+            indptr, neighbours = self.graph.indptr, self.graph.indices
+            voters = np.repeat(np.arange(n_voters), np.diff(indptr))
+
+            # the neighbours one may delegate to, and the least indecisive of them
+            consistent = self._strict_supersets(poset_of[neighbours], poset_of[voters])
+            scores = np.where(consistent, indecision[poset_of[neighbours]], np.inf)
+            min_scores = np.full(n_voters, np.inf)
+            np.minimum.at(min_scores, voters, scores)
+            liquid = consistent & (scores == min_scores[voters])
+
+            # proxy, first round: decisive voters vote themselves.
+            # second round: indecisive voters delegate to those who vote in the first round
+            decisive_voters = decisive[poset_of]
+            proxy = liquid & ~decisive_voters[voters] & decisive_voters[neighbours]
+
+            self._candidates = {}
+            for name, keep in (('liquid', liquid), ('proxy', proxy)):
+                table_indptr = np.zeros(n_voters + 1, dtype=np.int64)
+                np.cumsum(np.bincount(voters[keep], minlength=n_voters), out=table_indptr[1:])
+                self._candidates[name] = table_indptr, neighbours[keep].astype(np.int32)
+
+        return self._candidates[paradigm]
+
+    def _voter_posets(self):
+        """ The distinct partial orders of the voters.
+
+        Returns:
+        list(PartialOrder), np.array(int32): the distinct partial orders, and for every voter the index of its own """
+
+        if self._posets is None:
+            ids = dict()
+            poset_of = np.empty(len(self.id2voter), dtype=np.int32)
+            for voter_id, voter in self.id2voter.items():
+                poset_of[voter_id] = ids.setdefault(voter.partial, len(ids))
+            self._posets = list(ids), poset_of
+
+        return self._posets
+
+    def _posets_table(self):
+        """ The distinct partial orders of the voters (see _voter_posets), as arrays.
+
+        Returns:
+        np.array(uint64): (P, n_words) packed edge masks of every poset, split into 64-bit words
+        np.array(float): (P,) indecisiveness of every poset
+        np.array(bool): (P,) whether every poset is a strict order """
+
+        if self._poset_table is None:
+            posets, _ = self._voter_posets()
+
+            n_words = max(1, -(-max(poset.mask.bit_length() for poset in posets) // 64))
+            words = np.array([[(poset.mask >> (64 * w)) & (2**64 - 1) for w in range(n_words)] for poset in posets], dtype=np.uint64)
+
+            indecision = np.array([poset.compute_indecisivness() for poset in posets])
+            decisive = np.array([poset.count_linear_extensions() == 1 for poset in posets])
+            self._poset_table = words, indecision, decisive
+
+        return self._poset_table
+
+    def _strict_supersets(self, a, b):
+        """ Whether every poset of a is a strict superset of the poset of b at the same index. Every distinct
+        pair is tested once, so memory and time grow with the pairs (not with all the P x P of them).
+
+        Parameters:
+        a (np.array(int)): poset indices (see _voter_posets)
+        b (np.array(int)): poset indices, as many as a
+
+        Returns:
+        np.array(bool): one per pair """
+
+        words, _, _ = self._posets_table()
+
+        pairs, inverse = np.unique(a.astype(np.int64) * len(words) + b, return_inverse=True)
+        wa, wb = words[pairs // len(words)], words[pairs % len(words)]
+        # a contains b (and is not b)
+        superset = ((wa & wb) == wb).all(axis=1) & (wa != wb).any(axis=1)
 
-    def _pick_delegations(self, paradigm='liquid', print_delegations=False):
+        return superset[inverse.reshape(-1)]
+
+    def _ballot_codec(self):
+        """ Returns:
+        BallotCodec: the integer encoding of the ballots over the voters' alternatives """
+
+        posets, _ = self._voter_posets()
+        assert len({poset.alternatives for poset in posets}) == 1, 'All voters must rank the same alternatives.'
+        return BallotCodec(posets[0].alternatives)
+
+    def _pick_delegations(self, paradigm='liquid', print_delegations=False, rng=None):
         """ Pick the delegations for each voter.
 
         Parameters:
         paradigm (str): direct voting, proxy voting or liquid democracy?
         print_delegations (bool): whether to print the selected delegations
+        rng (np.random.Generator): source of randomness. If None, one is seeded from the `random` module
 
         Returns:
-        dict(int, [int, NoneType]): a mapping from a voter id to another """
+        np.array(int32): for every voter id, the id of the voter it delegates to (-1 if it votes itself) """
+
+        delegations = self._sample_delegations(paradigm, 1, rng)[0]
 
-        delegations = dict()
+        if print_delegations:
+            self._print_delegations(delegations)
 
-        if paradigm == 'liquid':
+        return delegations
 
-            # for every voter...
-            for voter_id, voter in self.id2voter.items():
-                # get its neighbours' ids
-                neighbours_id = self.getNeighbours(voter_id)
-                # and the neighbours themselves
-                neighbours = [self.id2voter[neighbour_id] for neighbour_id in neighbours_id]
-                # construct delegations. This will be a list.
-                delegation = voter.delegate(neighbours_id, neighbours)
-                # if it is empty, we do not delegate. Signal this with a None.
-                if len(delegation) == 0:
-                    delegation = None
-                # otherwise, pick a random delegation from the list (notice that, if it is of length 1, it's simply the only element)
-                else:
-                    delegation = random.choice(delegation)
-
-                delegations[voter_id] = delegation
-
-        elif paradigm == 'direct':
-            for voter_id in self.id2voter.keys():
-                delegations[voter_id] = None
-        elif paradigm == 'proxy':
-            # first round: pick decisive voters
-            for voter_id, voter in self.id2voter.items():
-                if len(voter.partial.get_strict_orders()) == 1:
-                    delegations[voter_id] = None
+    def _sample_delegations(self, paradigm, n_trials, rng=None):
+        """ Pick the delegations for each voter, independently for several trials.
 
-            # second round: indecisive voters find guru to delegate, or vote randomly
-            for voter_id, voter in self.id2voter.items():
-                assert voter_id >= 0, 'voter id must be positive'
-                try:
-                    # skip decisive voters that vote already
-                    if delegations[voter_id] is None:
-                        continue
-                except KeyError:
-                    # get its neighbours' ids
-                    neighbours_id = self.getNeighbours(voter_id)
-                    # and the neighbours themselves
-                    neighbours = [self.id2voter[neighbour_id] for neighbour_id in neighbours_id]
-                    # get viable delegations
-                    delegation = voter.delegate(neighbours_id, neighbours)
-                    # if no delegation is available we do not delegate
-                    if len(delegation) == 0:
-                        # use a '-1' placeholder; switch for None afterwards
-                        delegation = -1
-                    else:
-                        delegation = self._filter_delegations(delegation, delegations)
-                        delegation = random.choice(delegation)
-                    delegations[voter_id] = delegation
-
-            delegations = {i: None if j == -1 else j for i, j in delegations.items()}
+        Parameters:
+        paradigm (str): direct voting, proxy voting or liquid democracy?
+        n_trials (int): number of independent trials
+        rng (np.random.Generator): source of randomness. If None, one is seeded from the `random` module
 
+        Returns:
+        np.array(int32): (n_trials, n_voters) array, with the id of the voter each voter delegates to (-1 if it votes itself) """
+
+        delegations = np.full((n_trials, len(self.id2voter)), -1, dtype=np.int32)
+
+        if paradigm == 'direct':
+            pass
+        elif paradigm in ('liquid', 'proxy'):
+            rng = np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+            indptr, indices = self._delegation_candidates(paradigm)
+            lengths = np.diff(indptr)
+            # voters with no candidates do not delegate (and keep the -1).
+            # the others pick a random candidate (notice that, if there is only one, it's simply that one)
+            delegating = np.flatnonzero(lengths)
+            picks = indptr[delegating] + (rng.random((n_trials, len(delegating))) * lengths[delegating]).astype(np.int64)
+            delegations[:, delegating] = indices[picks]
         else:
             raise NotImplementedError("This delegation strategy does not exist.")
 
-        if print_delegations:
-            for i, j in delegations.items():
-                if j is not None:
-                    print(f"{i} -> {j}")
-
         return delegations
 
-    def _cast_votes(self, paradigm='liquid', print_delegations=False):
+    @staticmethod
+    def _print_delegations(delegations):
+        for i in np.flatnonzero(delegations >= 0):
+            print(f"{i} -> {delegations[i]}")
+
+    def _cast_votes(self, paradigm='liquid', print_delegations=False, rng=None):
         """ Assign to each voter a vote.
 
         Parameters:
         paradigm (str): which paradigm? (liquid, direct, proxy...)
         print_delegations (bool): whether to print the selected delegations
+        rng (np.random.Generator): source of randomness for the delegations
 
         Returns:
-        dict(int, list(int)): a mapping from a voter id to a preference """
+        np.array(int32), dict(int, list(int)): for every voter id, the id of its guru (the voter who
+        actually casts its vote), and a mapping from every guru to its ballot """
 
         # pick the delegation
-        delegations = self._pick_delegations(paradigm, print_delegations)
+        delegations = self._pick_delegations(paradigm, print_delegations, rng)
 
-        votes = dict()
+        gurus = self._resolve_gurus(delegations)
 
-        # for every voter:
-        for voter_id in self.id2voter.keys():
-            votes[voter_id] = self._retrieve_vote(voter_id, votes, delegations)
+        # only the gurus (i.e., those who do not delegate) draw a ballot
+        ballots = {guru: self.id2voter[guru].cast_random_vote() for guru in np.flatnonzero(delegations < 0).tolist()}
 
-        return votes
+        return gurus, ballots
 
-    def _retrieve_vote(self, voter_id, votes, delegations):
-        """ Recursvely get the voter_id's vote from delegation graph
+    @staticmethod
+    def _resolve_gurus(delegations):
+        """ Follow the delegation chains until the end, for all voters at once (pointer jumping).
+        Every pass doubles the length of the followed chains, so it takes O(log depth) passes.
 
         Parameters:
-        voter_id (int): a voter
-        votes dict(int, list(int)): a mapping from a voter id to a preference
-        delegations (dict(int, [int, NoneType]): delegations from voter id to another
+        delegations (np.array(int32)): for every voter, the voter it delegates to (-1 if it votes itself).
+        It can also be a (n_trials, n_voters) array, one row per trial.
 
         Returns:
-        list(int): a ballot """
-
-        # if this person already voted, simply return the vote.
-        if voter_id in votes.keys():
-            return votes[voter_id]
-        # otherwise...
-        # if he does not delegate,
-        # save his vote and return it
-        elif delegations[voter_id] is None:
-            votes[voter_id] = self.id2voter[voter_id].cast_random_vote()
-            return votes[voter_id]
-        # if he does, get the vote (recursvely) of the person he delegates to
-        # we save it as ours and return it
-        else:
-            next_vote = self._retrieve_vote(delegations[voter_id], votes, delegations)
-            votes[voter_id] = next_vote
-            return next_vote
+        np.array(int32): for every voter, the voter at the end of its chain """
 
-    def _filter_delegations(self, d, delegations):
-        """ Take a list of possible delegations and filter out voters that
-        do not vote themselves (for proxy voting)
+        gurus = np.where(delegations < 0, np.arange(delegations.shape[-1], dtype=np.int32), delegations)
 
-        Parameters:
-        d list(int): list of possible delegations for particular voter
-        delegations dict(int, [int, NoneType]): delegation mapping
+        while True:
+            following = np.take_along_axis(gurus, gurus, axis=-1)
+            if np.array_equal(following, gurus):
+                return gurus
+            gurus = following
 
-        Returns:
-        list(int)"""
-
-        filt_d = []
-        for voter in d:
-            try:
-                # add a voter id iff the voter declared to vote in 1st round
-                if delegations[voter] is None:
-                    filt_d.append(voter)
-            except:
-                # voter has no declared delegation decision=> he did not choose to vote in 1st round
-                pass
-        # iff there is nobody to delegate to, use the proxy-voting placeholder
-        if len(filt_d) == 0:
-            filt_d.append(-1)
-
-        return filt_d
-
-    def get_preferences(self, paradigm='liquid', print_delegations=False, print_preferences=False):
+    def get_preferences(self, paradigm='liquid', print_delegations=False, print_preferences=False, rng=None):
         """ Return the preference list of the social network. This function
         creates the delegations, casts the votes and returns the preference lists.
 
@@ -220,31 +317,22 @@ class SocialNetwork:
         paradigm (str): which paradigm? (liquid, direct, proxy...)
         print_delegations (bool): whether to print the selected delegations
         print_preferences (bool): print the preferences nicely
+        rng (np.random.Generator): source of randomness for the delegations
 
         Returns:
         list(int), list(int): all the ballots with their counts """
 
         # cast the votes
-        votes = self._cast_votes(paradigm, print_delegations)
-
-        # support functions because a list is not hashable
-        # this enables us to use the Counter
-        to_key = lambda pref: ' '.join(map(str, pref))
-        to_list = lambda key: [int(val) for val in key.split()]
-
-        # transform the votes into keys, so we can use the counter
-        keys = map(to_key, votes.values())
-
-        # count the preferences
-        counter = Counter(keys)
-        # prepare results
-        preferences, counts = [], []
-        # for every possible preference (now expressed as a string) and its count
-        for key_pref, count in counter.items():
-            # regenerate the preference list from the string and add it to the result...
-            preferences.append(to_list(key_pref))
-            # ...along with its count
-            counts.append(count)
+        gurus, ballots = self._cast_votes(paradigm, print_delegations, rng)
+        # how many voters each guru represents
+        weights = np.bincount(gurus, minlength=len(self.id2voter))
+
+        # encode the ballots as integers, and count them weighted by the number of voters behind them
+        codec = self._ballot_codec()
+        ids = codec.encode(list(ballots.values()))
+        ids, counts = codec.count_ids(ids, weights[list(ballots.keys())])
+        # back to lists, for the caller
+        preferences, counts = codec.to_lists(ids, counts)
 
         assert (sum(counts) == len(self.id2voter.keys()))
 
@@ -253,6 +341,62 @@ class SocialNetwork:
 
         return preferences, counts
 
+    def get_preferences_batch(self, paradigm='liquid', n_trials=1, rng=None, print_delegations=False, print_preferences=False):
+        """ Same as get_preferences, for n_trials independent elections at once. Delegations, gurus and
+        ballots of all the trials are computed with array operations; the ballots are drawn in bulk
+        from each distinct partial order.
+
+        Parameters:
+        paradigm (str): which paradigm? (liquid, direct, proxy...)
+        n_trials (int): number of independent elections
+        rng (np.random.Generator): source of randomness. If None, one is seeded from the `random` module
+        print_delegations (bool): whether to print the selected delegations (of every trial)
+        print_preferences (bool): print the preferences (of every trial) nicely
+
+        Returns:
+        list(list(int)), np.array(int64): all the ballots cast in any trial, and a (n_trials, n_ballots)
+        matrix with, per trial, how many voters ended up with each ballot """
+
+        rng = np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+
+        delegations = self._sample_delegations(paradigm, n_trials, rng)
+        gurus = self._resolve_gurus(delegations)
+        n_voters = delegations.shape[1]
+
+        # how many voters each guru represents, per trial
+        offsets = np.arange(n_trials, dtype=np.int64)[:, None] * n_voters
+        weights = np.bincount((gurus + offsets).ravel(), minlength=n_trials * n_voters).reshape(n_trials, n_voters)
+
+        # only the gurus (i.e., those who do not delegate) draw a ballot: group them by partial order
+        trial_ids, voter_ids = np.nonzero(delegations < 0)
+        posets, poset_of = self._voter_posets()
+        guru_posets = poset_of[voter_ids]
+
+        ballots = np.empty((len(voter_ids), len(posets[0].alternatives)), dtype=np.uint8)
+        for poset_id in np.unique(guru_posets):
+            drawing = np.flatnonzero(guru_posets == poset_id)
+            ballots[drawing] = posets[poset_id].sample_strict_orders(len(drawing), rng)
+
+        # index the ballots (by their integer encoding) and count them per trial
+        codec = self._ballot_codec()
+        unique_ids, ballot_ids = np.unique(codec.encode(ballots), return_inverse=True)
+        ballot_ids = ballot_ids.ravel()
+        counts = np.bincount(trial_ids * len(unique_ids) + ballot_ids, weights=weights[trial_ids, voter_ids],
+                             minlength=n_trials * len(unique_ids)).reshape(n_trials, len(unique_ids)).astype(np.int64)
+
+        assert (counts.sum(axis=1) == n_voters).all()
+
+        preferences = codec.decode(unique_ids).tolist()
+
+        for trial in range(n_trials):
+            if print_delegations:
+                self._print_delegations(delegations[trial])
+            if print_preferences:
+                present = np.flatnonzero(counts[trial])
+                self.pretty_print_pref([preferences[i] for i in present], counts[trial, present].tolist())
+
+        return preferences, counts
+
     def pretty_print_pref(self, preferences, counts):
         """ Print cutely the preferences of the electorate
 
@@ -0,0 +1,463 @@
+import argparse
+import json
+import random
+import time
+import numpy as np
+from itertools import permutations, product
+from tqdm import tqdm
+from aggregators import CellAggregator
+from ballots import BallotCodec
+from dataset import Dataset
+from graphcache import GraphCache
+from networks import generate_graph
+from partialorders import PartialOrder
+from profiles import Profile
+from resultstore import ResultWriter, ResultStore
+from socialnetwork import SocialNetwork
+from utils import RegretTable, seed_cell, map_cells
+from voter import Voter
+from voter_type import VoterTypes
+from votingrules import VotingRules
+
+
+# everything a sweep can be configured with. A config only needs the keys that differ from these.
+DEFAULT_CONFIG = {
+    'seed': 42,
+    # who votes. source: 'random' (impartial culture), 'types', 'preflib' (with a 'path'),
+    # or 'cliques' (voters of the same type in each clique of a caveman graph)
+    'voters': {'source': 'random', 'alternatives': 4, 'voters': 100, 'voter_types': 2, 'type_gen': 'half_normal'},
+    # True: the same preferences for the whole sweep. False: new preferences for every population
+    'shared_population': True,
+    'indecisiveness': [0, 0.2, 0.2, 0.2, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+    # graph families. params: list of dicts, or a grid (dict of lists). If missing, the default grid of the type
+    'graphs': [{'type': 'regular'}],
+    'graphs_per_setting': 25,
+    # populations on every graph, and elections (with new delegations and ballots) on every population
+    'populations_per_graph': 1,
+    'elections_per_population': 100,
+    'paradigms': ['direct', 'proxy', 'liquid'],
+    'rules': VotingRules.rules,
+    'metrics': ['regret'],
+    'workers': 1,
+    # if given, graphs are read from (and stored in) this directory (see graphcache.py)
+    'graph_cache': None,
+    # if given, every record (coordinates, winner, metrics, timing) is streamed to this directory (see resultstore.py)
+    # instead of being kept in memory
+    'results_dir': None,
+    # output
+    'print_graph': False,
+    'print_delegations': False,
+    'print_preferences': False,
+    'print_winners': True,
+    'ttest': False,
+}
+
+METRICS = ['regret', 'partial_regret']
+
+
+# since every graph type has diff. parameter spaces,
+# this returns the default grid of parameters, given a graph type name.
+def default_params(graph_type):
+    degrees = [4, 8, 12, 16]
+    probs = [0.25, 0.5, 0.75]
+
+    if graph_type in ('path', 'scale-free'):
+        return [dict()]
+
+    elif graph_type == 'random':
+        return [{'prob': prob} for prob in probs]
+
+    elif graph_type == 'regular':
+        return [{'degree': degree} for degree in degrees]
+
+    elif graph_type == 'small-world':
+        return [{'degree': degree, 'prob': prob} for degree in degrees for prob in probs]
+
+    else:
+        raise NotImplementedError(f'No default parameters for graph type {graph_type}')
+
+
+def _expand_params(graph):
+    """ The list of parameter settings of a graph family of the config """
+
+    params = graph.get('params')
+    if params is None:
+        return default_params(graph['type'])
+    # a grid: every combination of the values
+    if isinstance(params, dict):
+        keys = list(params.keys())
+        return [dict(zip(keys, values)) for values in product(*(params[key] for key in keys))]
+    return list(params)
+
+
+def make_population(config):
+    """ Draw the preferences of a population.
+
+    Parameters:
+    config (dict): the sweep config
+
+    Returns:
+    [Dataset, dict(int, Voter)]: a Dataset (partial orders are drawn for every social network),
+    or directly the voters (for cliques) """
+
+    voters = config['voters']
+    source = voters['source']
+
+    if source == 'random':
+        return Dataset(source='random', rand_params=[voters['alternatives'], voters['voters']])
+    elif source == 'types':
+        return Dataset(source='type_random', rand_params=[voters['alternatives'], voters['voters'], voters['voter_types']],
+                       type_generation=voters['type_gen'])
+    elif source == 'preflib':
+        return Dataset(source=voters['path'])
+    elif source == 'cliques':
+        return _clique_population(voters, config['indecisiveness'])
+    else:
+        raise NotImplementedError(f'Unknown voter source {source}')
+
+
+def _clique_population(voters, indecisiveness):
+    """ One random type per clique; the voters of a clique are sampled around its type """
+
+    clique_size = voters['clique_size']
+    num_cliques = voters['voters'] // clique_size
+    generator = VoterTypes(num_cliques, voters['type_gen'], num_alternatives=voters['alternatives'])
+    type_list = random.sample(list(permutations(range(1, voters['alternatives'] + 1))), num_cliques)
+
+    id2voter = {}
+    for i, t in enumerate(type_list):
+        # all the voters of the clique at once
+        ballots = generator.generate_batch(clique_size, list(t)).tolist()
+        for j, strict in enumerate(ballots, start=i * clique_size):
+            partial = PartialOrder.generate_from_strict(strict, random.choice(indecisiveness))
+            id2voter[j] = Voter(partial, strict)
+
+    return id2voter
+
+
+def true_profile(population):
+    """ Returns:
+    list(list(int)), list(int): the true preferences of a population, and their counts """
+
+    if isinstance(population, Dataset):
+        return population.preferences, population.counts
+
+    all_preferences = [voter.strict for voter in population.values()]
+    codec = BallotCodec(all_preferences[0])
+    return codec.to_lists(*codec.count(all_preferences))
+
+
+def _count_voters(population):
+    return population.count_voters() if isinstance(population, Dataset) else len(population)
+
+
+def _social_network(population, graph, config):
+    if isinstance(population, Dataset):
+        return SocialNetwork(strategy='dataset_and_nx_graph', possible_indecision_levels=config['indecisiveness'],
+                             graph=graph, dataset=population, print_graph=config['print_graph'])
+    return SocialNetwork(strategy='from_voter_graph', id2voter=population, graph=graph, print_graph=config['print_graph'])
+
+
+def _generate_graph(config, num_voters, graph_type, graph_index, params):
+    """ The graph_index-th graph generated with these parameters (from the cache, if any) """
+
+    seed = config['seed'] + graph_index + 1
+    if config['graph_cache'] is not None:
+        return GraphCache(config['graph_cache']).get(num_voters, graph_type, seed, params)
+    return generate_graph(num_voters=num_voters, gtype=graph_type, seed=seed, params=params)
+
+
+# run the elections of one population on one graph: this is a cell of the sweep.
+# A cell only depends on its coordinates, so cells can run in any order, in any process.
+def run_cell(cell):
+    config, shared, num_voters, graph_type, params_index, params, graph_index, population_index, graph = cell
+    start = time.perf_counter()
+
+    # the graph_index-th graph generated with this parameters (unless the planner built it already)
+    if graph is None:
+        graph = _generate_graph(config, num_voters, graph_type, graph_index, params)
+
+    # from here on, all the randomness comes from the cell coordinates
+    rng = seed_cell(config['seed'], graph_type, params_index, graph_index, population_index)
+
+    if shared is None:
+        population = make_population(config)
+        regret_table = RegretTable(*true_profile(population))
+    else:
+        population, regret_table = shared
+
+    # the summary of the elections of every paradigm and rule, and (only if they are stored) the elections themselves
+    aggregates = {paradigm: {rule: CellAggregator(config['metrics']) for rule in config['rules']} for paradigm in config['paradigms']}
+    records = {paradigm: {} for paradigm in config['paradigms']} if config['results_dir'] is not None else None
+
+    # delegation candidates and partial orders are computed once, for all paradigms and elections
+    SN = _social_network(population, graph, config)
+
+    for paradigm in config['paradigms']:
+
+        # get the preferences of all the elections at once
+        SN_preferences, SN_counts_batch = SN.get_preferences_batch(paradigm, config['elections_per_population'], rng=rng,
+                                                                   print_delegations=config['print_delegations'],
+                                                                   print_preferences=config['print_preferences'])
+
+        # the statistics of the profiles are shared by all the rules
+        profile = Profile(SN_preferences, SN_counts_batch)
+
+        for rule in config['rules']:
+            # this corresponds to random tie breaking
+            rule_winners = [random.choice([c for c, won in zip(profile.candidates, mask) if won])
+                            for mask in VotingRules.winner_masks(rule, profile)]
+
+            values = {}
+            if 'regret' in config['metrics']:
+                values['regret'] = regret_table.batch(rule_winners)
+            if 'partial_regret' in config['metrics']:
+                values['partial_regret'] = SN.partial_regret_table.batch(rule_winners)
+
+            aggregates[paradigm][rule].add(rule_winners, **values)
+            if records is not None:
+                records[paradigm][rule] = (rule_winners, values)
+
+    return aggregates, records, time.perf_counter() - start
+
+
+class Sweep:
+    """An experiment sweep: every graph family and parameter setting, graphs_per_setting graphs per setting,
+    populations_per_graph populations per graph, elections_per_population elections per population,
+    under every paradigm and voting rule.
+
+    The loops are planned so that every object is built as rarely as possible: the shared population
+    (and its regret table) once, every graph once, every social network (with its delegation tables)
+    once per population, and the ballots of all the elections of a population in one batch."""
+
+    def __init__(self, config):
+        """ Parameters:
+        config (dict): the keys of DEFAULT_CONFIG to override (voters is merged with the default one) """
+
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f'Unknown config keys: {sorted(unknown)}')
+
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.config['voters'] = {**DEFAULT_CONFIG['voters'], **config.get('voters', {})}
+
+        for metric in self.config['metrics']:
+            if metric not in METRICS:
+                raise NotImplementedError(f'Unknown metric {metric}. Known metrics: {METRICS}')
+        for rule in self.config['rules']:
+            if rule not in VotingRules.rules:
+                raise NotImplementedError(f'Unknown rule {rule}. Known rules: {VotingRules.rules}')
+
+        if self.config['voters']['source'] == 'cliques' and self.config['voters']['type_gen'] == 'tshirt':
+            raise ValueError('Cliques draw their voters around a type: use the half_normal type_gen.')
+
+        # graph types, in order of appearance (settings of the same type are reported together)
+        self.graph_types = list(dict.fromkeys(graph['type'] for graph in self.config['graphs']))
+
+    @classmethod
+    def from_file(cls, path):
+        """ Load a config from a JSON (or, if PyYAML is installed, YAML) file """
+
+        with open(path, 'r') as f:
+            if path.endswith(('.yaml', '.yml')):
+                import yaml
+                return cls(yaml.safe_load(f))
+            return cls(json.load(f))
+
+    def settings(self):
+        """ Returns:
+        list((str, int, dict)): graph type, index of the setting and parameters of every setting """
+
+        return [(graph['type'], params_index, params)
+                for graph in self.config['graphs']
+                for params_index, params in enumerate(_expand_params(graph))]
+
+    def count_elections(self):
+        """ int: total number of elections (per paradigm and rule) """
+
+        config = self.config
+        return len(self.settings()) * config['graphs_per_setting'] * config['populations_per_graph'] * config['elections_per_population']
+
+    def plan(self, shared, num_voters):
+        """ Yield the cells of the sweep.
+
+        Parameters:
+        shared ([(population, RegretTable), NoneType]): the shared population, if any
+        num_voters (int): number of voters (nodes of the graphs) """
+
+        config = self.config
+        for graph_type, params_index, params in self.settings():
+            for graph_index in range(config['graphs_per_setting']):
+                # with a single population, the cell builds its own graph (in its own process).
+                # Otherwise, the graph is built once here and shared by all the populations
+                graph = None
+                if config['populations_per_graph'] > 1:
+                    graph = _generate_graph(config, num_voters, graph_type, graph_index, params)
+
+                for population_index in range(config['populations_per_graph']):
+                    yield config, shared, num_voters, graph_type, params_index, params, graph_index, population_index, graph
+
+    def run(self, progress=True):
+        """ Run the sweep.
+
+        Parameters:
+        progress (bool): show a progress bar
+
+        Returns:
+        dict: aggregates[graph_type][paradigm][rule] is the CellAggregator of all the elections (metrics and winners) """
+
+        config = self.config
+        seed_cell(config['seed'])
+
+        shared = None
+        if config['shared_population']:
+            population = make_population(config)
+            shared = (population, RegretTable(*true_profile(population)))
+            num_voters = _count_voters(population)
+        else:
+            num_voters = config['voters']['voters']
+
+        # only summaries are kept in memory; every election is streamed to disk if asked
+        aggregates = self.empty_aggregates()
+        writer = self._writer() if config['results_dir'] is not None else None
+
+        cells = list(self.plan(shared, num_voters))
+        steps_per_cell = config['elections_per_population'] * len(config['paradigms']) * len(config['rules'])
+
+        total = self.count_elections() * len(config['paradigms']) * len(config['rules'])
+        with tqdm(total=total, leave=False, disable=not progress) as pbar:
+            # merge the results in the order of the cells
+            for cell, (cell_aggregates, cell_records, seconds) in zip(cells, map_cells(run_cell, cells, config['workers'])):
+                graph_type, params_index, params, graph_index, population_index = cell[3:8]
+                for paradigm in config['paradigms']:
+                    for rule in config['rules']:
+                        aggregates[graph_type][paradigm][rule].merge(cell_aggregates[paradigm][rule])
+
+                        if writer is not None:
+                            rule_winners, values = cell_records[paradigm][rule]
+                            writer.append(graph_type=writer.code('graph_type', graph_type), params_index=params_index,
+                                          graph_index=graph_index, population_index=population_index,
+                                          election=np.arange(len(rule_winners)),
+                                          paradigm=writer.code('paradigm', paradigm), rule=writer.code('rule', rule),
+                                          winner=rule_winners, cell_seconds=seconds, **values)
+
+                pbar.update(steps_per_cell)
+
+        if writer is not None:
+            writer.close()
+
+        return aggregates
+
+    def empty_aggregates(self):
+        """ dict: aggregates[graph_type][paradigm][rule], all empty """
+
+        config = self.config
+        return {graph_type: {paradigm: {rule: CellAggregator(config['metrics']) for rule in config['rules']}
+                             for paradigm in config['paradigms']} for graph_type in self.graph_types}
+
+    def _writer(self):
+        """ ResultWriter: the writer of the records of this sweep """
+
+        config = self.config
+        columns = {'graph_type': 'uint8', 'params_index': 'int32', 'graph_index': 'int32', 'population_index': 'int32',
+                   'election': 'int32', 'paradigm': 'uint8', 'rule': 'uint8', 'winner': 'int32', 'cell_seconds': 'float64'}
+        columns.update({metric: 'float64' for metric in config['metrics']})
+        categories = {'graph_type': self.graph_types, 'paradigm': config['paradigms'], 'rule': config['rules']}
+
+        return ResultWriter(config['results_dir'], columns, categories, metadata={'config': config})
+
+    @classmethod
+    def from_results(cls, directory):
+        """ The sweep that wrote a results directory, and its results: report them again without recomputing
+
+        Parameters:
+        directory (str): the results_dir of the sweep
+
+        Returns:
+        Sweep, dict: the sweep and its aggregates (see run) """
+
+        store = ResultStore(directory)
+        sweep = cls(store.metadata['config'])
+        aggregates = sweep.empty_aggregates()
+
+        # one shard at a time: memory does not grow with the number of elections
+        for shard in store.iter_shards(['graph_type', 'paradigm', 'rule', 'winner'] + sweep.config['metrics']):
+            for g, graph_type in enumerate(store.categories['graph_type']):
+                for p, paradigm in enumerate(store.categories['paradigm']):
+                    for r, rule in enumerate(store.categories['rule']):
+                        mask = (shard['graph_type'] == g) & (shard['paradigm'] == p) & (shard['rule'] == r)
+                        aggregates[graph_type][paradigm][rule].add(shard['winner'][mask].tolist(),
+                                                                    **{metric: shard[metric][mask] for metric in sweep.config['metrics']})
+
+        return sweep, aggregates
+
+    def report(self, aggregates):
+        """ Print mean and std of every metric, the winners and (optionally) the t-tests between paradigms
+
+        Parameters:
+        aggregates (dict): see run """
+
+        config = self.config
+        paradigms = config['paradigms']
+
+        for metric in config['metrics']:
+            name = metric.replace('_', ' ')
+            # by default, we say it is not passed
+            t_tests = {}
+            for graph_type in self.graph_types:
+                for rule in config['rules']:
+                    for paradigm in paradigms:
+                        # data
+                        aggregate = aggregates[graph_type][paradigm][rule]
+                        stats = aggregate.stats[metric]
+                        print(f'avg {name} {graph_type}, {rule}, {paradigm}: {stats.mean:.4f} (+- {stats.std():.4f})')
+                        # winners are the same for every metric: print them once
+                        if config['print_winners'] and metric == config['metrics'][0]:
+                            print(', '.join([f'{w} won {c} times' for w, c in sorted(aggregate.winners.items())]))
+                        # t test, from the summary statistics
+                        for other in paradigms:
+                            if other != paradigm:
+                                stat, p = stats.ttest(aggregates[graph_type][other][rule].stats[metric])
+                                if p <= 0.05:
+                                    t_tests[graph_type, paradigm, other, rule] = 'PASSED'
+                    print("#######")
+
+            if config['ttest']:
+                print("######### T-TESTS ###########")
+                for graph_type in self.graph_types:
+                    for rule in config['rules']:
+                        for i, first in enumerate(paradigms):
+                            # all the pairs of paradigms, without repetition
+                            for second in paradigms[i + 1:]:
+                                print(f"{graph_type}, {rule}, {first}/{second}: {t_tests.get((graph_type, first, second, rule), 'FAILED')}")
+                    print('##')
+
+            print("*********")
+
+
+# run a sweep from a config file, or report the results of a previous one
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('config', type=str, nargs='?', help='JSON (or YAML) config of the sweep')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes (overrides the config)')
+    parser.add_argument('--results_dir', type=str, default=None, help='Where to store the records (overrides the config)')
+    parser.add_argument('--graph_cache', '--graph-cache', type=str, default=None, help='Directory of the graph cache (overrides the config)')
+    parser.add_argument('--report', type=str, default=None, help='Only report the results stored in this directory')
+    parser.add_argument('--ttest', action='store_true', help='Perform t-test')
+    args = parser.parse_args()
+
+    if args.report is not None:
+        sweep, aggregates = Sweep.from_results(args.report)
+    else:
+        assert args.config is not None, 'Give a config, or --report a results directory'
+        sweep = Sweep.from_file(args.config)
+        if args.workers is not None:
+            sweep.config['workers'] = args.workers
+        if args.results_dir is not None:
+            sweep.config['results_dir'] = args.results_dir
+        if args.graph_cache is not None:
+            sweep.config['graph_cache'] = args.graph_cache
+        aggregates = sweep.run()
+
+    sweep.config['ttest'] = sweep.config['ttest'] or args.ttest
+    sweep.report(aggregates)
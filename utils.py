@@ -1,63 +1,188 @@
+import hashlib
 import networkx as nx
+import numpy as np
+import random
+from concurrent.futures import ProcessPoolExecutor
 from partialorders import PartialOrder
+from profiles import Profile
 
 
-def regret(winner, preferences, counts):
-    regret = []
-    assert len(preferences) == len(counts)
+class RegretTable:
+    """Regret of every alternative with respect to a fixed (true) profile: the average position of
+    the alternative in the voters' true preferences. Computed once, then every lookup is O(1)."""
 
-    for preference, count in zip(preferences, counts):
-        assert winner in preference
-        regret += [preference.index(winner)] * count
+    def __init__(self, preferences, counts):
+        """ Parameters:
+        preferences (list(list(int))): the true ballots
+        counts (list(int)): one per ballot: how many people have that ballot """
 
-    return sum(regret) * 1. / len(regret)
+        assert len(preferences) == len(counts)
 
+        profile = Profile(preferences, counts)
+        self.alternatives = profile.candidates
+        self._index = {a: i for i, a in enumerate(self.alternatives)}
 
-def partial_regret(winner, voters):
-    # compute average partial regret, that is, per each
-    # voter number of alternatives that are preferred to the winner
-    p_regret = []
+        # total position of every alternative, over all the voters
+        totals = profile.position_histogram @ np.arange(profile.num_candidates)
+        self.table = totals / profile.num_voters
+
+    def __call__(self, winner):
+        """ Parameters:
+        winner (int): an alternative
+
+        Returns:
+        (float): its regret """
+
+        return float(self.table[self._index[winner]])
+
+    def batch(self, winners):
+        """ Parameters:
+        winners (list(int)): alternatives
+
+        Returns:
+        np.array(float): their regrets """
 
-    for voter in voters:
-        p_regret.append(sum((1 for i, j in voter.partial.edges if j == winner)))
+        return self.table[[self._index[winner] for winner in winners]]
 
-    return sum(p_regret) * 1. / len(p_regret)
+    def expected(self, winner_masks):
+        """ Expected regret under uniformly random tie-breaking.
 
+        Parameters:
+        winner_masks (np.array(bool)): (n, m) masks of the tied winners, over self.alternatives
 
-def ind_levels(N):
-    # function that we will use to get the edges from a dictionary-graph
-    get_edges = lambda graph: {(i, j) for i in graph.keys() for j in graph[i]}
+        Returns:
+        np.array(float): (n,) expected regrets """
 
-    # will contain all indifference levels
-    all_levels = set()
+        winner_masks = np.asarray(winner_masks)
+        return (winner_masks @ self.table) / winner_masks.sum(axis=-1)
 
-    # [1,2,3,...N]
-    strict = list(range(1, N+1))
-    # strict order represented as a transitive graph
-    graph = PartialOrder(strict).partial
 
-    # recursive function used to actually computed the values
-    # this will populate "all_levels"
-    def aux(graph):
-        all_levels.add(PartialOrder(graph).compute_indecisivness())
+def regret(winner, preferences, counts):
+    return RegretTable(preferences, counts)(winner)
+
+
+class PartialRegretTable:
+    """Partial regret of every alternative for a fixed population: the average number of alternatives
+    that the voters know to be better than it. Computed once from the dominance counts of the voters'
+    partial orders, then every lookup is O(1)."""
+
+    def __init__(self, voters):
+        """ Parameters:
+        voters (iterable(Voter)): the voters (with the same alternatives) """
+
+        voters = list(voters)
+        self.alternatives = list(voters[0].partial.alternatives)
+        self._index = {a: i for i, a in enumerate(self.alternatives)}
 
-        edges = get_edges(graph)
+        # (n_voters, m): per voter and alternative, how many alternatives beat it
+        self.dominance = np.array([voter.partial.dominance_counts() for voter in voters])
+        self.table = self.dominance.sum(axis=0) / len(voters)
 
-        # for all edges, drop this edge and
-        # compute recursevly indecision on the obtained graph
-        for edge in edges:
-            new_partial = {i: [] for i in graph.keys()}
-            for edge_prime in edges:
-                if edge != edge_prime:
-                    i, j = edge_prime
-                    new_partial[i].append(j)
-            aux(new_partial)
+    def __call__(self, winner):
+        """ Parameters:
+        winner (int): an alternative
 
-    # populate all_levels
-    aux(graph)
+        Returns:
+        (float): its partial regret """
 
-    # return result, as a nice sorted list
-    return sorted(all_levels)
+        return float(self.table[self._index[winner]])
+
+    def batch(self, winners):
+        """ Parameters:
+        winners (list(int)): alternatives
+
+        Returns:
+        np.array(float): their partial regrets """
+
+        return self.table[[self._index[winner] for winner in winners]]
+
+
+def partial_regret(winner, voters):
+    # compute average partial regret, that is, per each
+    # voter number of alternatives that are preferred to the winner
+    return PartialRegretTable(voters)(winner)
+
+
+def ind_levels(N, return_posets=False):
+    """ Compute all the indecision levels achievable by a partial order over N alternatives
+    that is consistent with a strict order (i.e. that can be obtained from it by dropping edges).
+
+    The search runs over transitive edge sets encoded as bitmasks (bit i*N + j means that i beats j),
+    and visits each partial order once. Dropping a covering edge of a partial order always gives another
+    partial order, and every partial order below can be reached this way, so there is no need to recompute closures.
+
+    Parameters:
+    N (int): number of alternatives
+    return_posets (bool): whether to also return, per level, the partial orders with that level
+
+    Returns:
+    list(float): the sorted levels. If return_posets, also a dict(float, list(PartialOrder)) """
+
+    row = (1 << N) - 1
+    # squares[S]: the bits of the pairs (i, j) with both i and j in the set S
+    squares = [sum(((S >> i & 1) << (i * N)) * S for i in range(N)) for S in range(1 << N)]
+
+    # number of linear extensions of the order `mask`, restricted to the set `S`.
+    # The restrictions repeat a lot across orders, so they are memoized for the whole search.
+    memo = dict()
+
+    def count(mask, S):
+        if S & (S - 1) == 0:
+            return 1
+        if (mask, S) not in memo:
+            beaten = 0
+            for i in range(N):
+                if S >> i & 1:
+                    beaten |= mask >> (i * N) & row
+            total = 0
+            # any minimal element can come first
+            minimals = S & ~beaten
+            for x in range(N):
+                if minimals >> x & 1:
+                    rest = S & ~(1 << x)
+                    total += count(mask & squares[rest], rest)
+            memo[(mask, S)] = total
+        return memo[(mask, S)]
+
+    # [1,2,3,...N] as a transitive graph: i beats all j > i
+    strict = sum(((row << (i + 1)) & row) << (i * N) for i in range(N))
+
+    max_strict_orders = count(0, row)
+    levels = dict()
+    stack = [strict]
+    visited = {strict}
+    while stack:
+        mask = stack.pop()
+        levels[mask] = (count(mask, row) - 1) / (max_strict_orders - 1)
+
+        rows = [mask >> (i * N) & row for i in range(N)]
+        for i in range(N):
+            # the edges of i that are not implied by other edges
+            implied = 0
+            for k in range(N):
+                if rows[i] >> k & 1:
+                    implied |= rows[k]
+            covers = rows[i] & ~implied
+
+            for j in range(N):
+                if covers >> j & 1:
+                    child = mask & ~(1 << (i * N + j))
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append(child)
+
+    all_levels = sorted(set(levels.values()))
+
+    if not return_posets:
+        return all_levels
+
+    alternatives = tuple(range(1, N + 1))
+    posets = {level: [] for level in all_levels}
+    for mask, level in levels.items():
+        succ = tuple(mask >> (i * N) & row for i in range(N))
+        posets[level].append(PartialOrder._from_closure(alternatives, succ))
+
+    return all_levels, posets
 
 
 def get_dag_edit_distance(graph1, graph2, optim=False):
@@ -78,3 +203,45 @@ def get_dag_edit_distance(graph1, graph2, optim=False):
         dist = nx.algorithms.similarity.graph_edit_distance(G1, G2)
 
     return dist
+
+
+def seed_cell(seed, *coordinates):
+    """ Seed `random` and `np.random` with a stream derived only from the global seed and the coordinates
+    of a cell of an experiment sweep (e.g. graph type, parameters, graph index), so that the results
+    of a cell do not depend on which cells ran before it, nor on which process runs it.
+
+    Parameters:
+    seed (int): the global seed
+    coordinates: anything with a stable repr (str, int, dict of those...)
+
+    Returns:
+    (np.random.Generator): a generator on the same stream, for the functions that take one """
+
+    # hash the coordinates: the builtin hash of a str changes between processes
+    entropy = [seed] + [int.from_bytes(hashlib.sha256(repr(c).encode()).digest()[:8], 'little') for c in coordinates]
+    sequence = np.random.SeedSequence(entropy)
+
+    random_state, numpy_state, generator_sequence = sequence.spawn(3)
+    random.seed(int.from_bytes(random_state.generate_state(4).tobytes(), 'little'))
+    np.random.seed(numpy_state.generate_state(4))
+
+    return np.random.default_rng(generator_sequence)
+
+
+def map_cells(function, cells, workers=1):
+    """ Apply function to every cell, in a pool of processes if workers > 1.
+    The results are yielded in the order of the cells, whatever the number of workers.
+
+    Parameters:
+    function (function): top-level function (it must be picklable)
+    cells (iterable): its arguments, one per cell
+    workers (int): number of processes
+
+    Returns:
+    generator: the results """
+
+    if workers <= 1:
+        yield from map(function, cells)
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            yield from executor.map(function, cells)
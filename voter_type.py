@@ -1,67 +1,111 @@
-from itertools import permutations
 import numpy as np
+from math import factorial
+from preflib import PrefLibReader
 
 
 class VoterTypes:
-    def __init__(self, num_types=2, gen_type='half_normal'):
-        """Create type generator object; interface - self.generate()"""
+    def __init__(self, num_types=2, gen_type='half_normal', num_alternatives=4):
+        """Create type generator object; interface - self.generate() (one ballot) and self.generate_batch(n)"""
         self._gen_types = {
                             'half_normal': self._half_normal_generator,
                             'tshirt': self._tshirt_generator
                           }
+        self._batch_gen_types = {
+                                  'half_normal': self._half_normal_batch,
+                                  'tshirt': self._tshirt_batch
+                                }
         self._num_types = num_types
+        self._num_alternatives = num_alternatives
         if gen_type not in self._gen_types:
             raise NotImplementedError('This generation type has not been implemented.')
 
         self.generate = self._gen_types[gen_type]
+        self.generate_batch = self._batch_gen_types[gen_type]
         if gen_type == 'half_normal':
             self._types = []
             self._pick_types()
-            hn_values = np.array([self._half_normal_pdf(x) for x in range(4)])
+            m = self._num_alternatives
+            hn_values = np.array([self._half_normal_pdf(x) for x in range(m)])
             self.distributions = []
-            for i in range(4):
-                distribution = hn_values[:4 - i] / sum(hn_values[:4 - i])
+            for i in range(m):
+                distribution = hn_values[:m - i] / sum(hn_values[:m - i])
                 self.distributions.append(distribution)
 
         if gen_type == 'tshirt':
             self._tshirt_init()
 
     def _tshirt_init(self, path='dataset/tshirt.soc'):
-        with open(path, 'r') as f:
-            raw = f.readlines()
-            num_alternatives = int(raw[0].strip('\n'))
-            preference_profiles = [list(eval(x[2:].strip('\n'))) for x in raw[13:]]
-
-        four_alternatives = list(np.random.choice(range(1, num_alternatives + 1), 4, replace=False))
-        a_map = {a: i + 1 for i, a in enumerate(four_alternatives)}
+        # one profile per (unique) ballot of the file, whatever its count
+        reader = PrefLibReader(path)
+        num_alternatives = reader.num_alternatives
+        _, ballots, _ = reader.read()
+        preference_profiles = [ballot[ballot > 0].tolist() for ballot in ballots]
+
+        chosen_alternatives = list(np.random.choice(range(1, num_alternatives + 1), self._num_alternatives, replace=False))
+        a_map = {a: i + 1 for i, a in enumerate(chosen_alternatives)}
         self._preference_profiles = [[a_map[a] for a in pref if a in a_map] for pref in preference_profiles]
 
-    def _tshirt_generator(self):
+    def _tshirt_generator(self, t=None):
+        if t is not None:
+            raise ValueError('The tshirt generator draws ballots from the dataset: it cannot draw them around a type.')
         p = np.random.randint(len(self._preference_profiles))
         return self._preference_profiles[p]
 
+    def _tshirt_batch(self, n, t=None):
+        """ n profiles drawn uniformly from the dataset (see generate_batch). Same signature as the half-normal
+        generator, but the ballots cannot be drawn around a given type """
+
+        if t is not None:
+            raise ValueError('The tshirt generator draws ballots from the dataset: it cannot draw them around a type.')
+
+        picks = np.random.randint(len(self._preference_profiles), size=n)
+        return np.array([self._preference_profiles[p] for p in picks], dtype=np.int64).reshape(n, -1)
+
     # half_normal
     def _pick_types(self):
-        all_types = [list(x) for x in permutations([1, 2, 3, 4])]
-        total = len(all_types)
+        m = self._num_alternatives
+        assert self._num_types <= factorial(m), 'More types than strict orders.'
         while len(self._types) < self._num_types:
-            t = all_types[np.random.randint(total)]
+            # a uniformly random strict order
+            t = (np.random.permutation(m) + 1).tolist()
 
             if t not in self._types:
                 self._types.append(t)
 
     def _half_normal_generator(self, t=None):
-        strict_order = []
-        # pick one of the types randomly
+        return self._half_normal_batch(1, t)[0].tolist()
 
-        if t is None:
-            t = self._types[np.random.randint(self._num_types)][:]
+    def _half_normal_batch(self, n, t=None):
+        """ n ballots, each drawn around a type: the alternative in every position is picked among those left,
+        the k-th of them (in the order of the type) with probability proportional to the half-normal pdf at k.
+        All the ballots are drawn together, one position at a time.
+
+        Parameters:
+        n (int): number of ballots
+        t (list(int)): the type of all the ballots. If None, every ballot picks one of the types at random
 
-        for i in range(4):
-            alternative = np.random.choice(t, p=self.distributions[i])
-            t.remove(alternative)
-            strict_order.append(alternative)
-        return strict_order
+        Returns:
+        np.array(int64): (n, m) ballots """
+
+        if t is None:
+            types = np.array(self._types, dtype=np.int64)
+            remaining = types[np.random.randint(self._num_types, size=n)]
+        else:
+            remaining = np.tile(np.array(t, dtype=np.int64), (n, 1))
+
+        m = remaining.shape[1]
+        rows = np.arange(n)
+        ballots = np.empty((n, m), dtype=np.int64)
+        for i in range(m):
+            # the position among the alternatives left
+            k = np.searchsorted(np.cumsum(self.distributions[i]), np.random.random(n), side='right')
+            k = np.minimum(k, m - i - 1)
+            ballots[:, i] = remaining[rows, k]
+            # and remove it
+            keep = np.arange(m - i) != k[:, None]
+            remaining = remaining[keep].reshape(n, m - i - 1)
+
+        return ballots
 
     def _half_normal_pdf(self, x, sigma=1):
         return (2**0.5 / (sigma * np.pi)) * np.exp(- (x**2 / (2 * sigma**2)))
@@ -74,3 +118,4 @@ if __name__ == "__main__":
     x = Types.generate()
 
     print(x)
+    print(Types.generate_batch(5))
@@ -1,81 +1,61 @@
+from profiles import Profile
+
+
 class VotingRules:
+    """Voting rules. The scores are read from a Profile, which computes and caches the statistics
+    (plurality and Borda vectors, majority matrix...) shared by the rules. A Profile can also hold
+    many profiles over the same ballots: then all of them are scored at once."""
 
     rules = ['plurality', 'borda', 'copeland']
 
     @classmethod
-    def _find_winner(cls, scoreboard):
-        winners = set()
-        m_val = max(scoreboard.values())
-        for k, val in scoreboard.items():
-            if val == m_val:
-                winners.add(k)
-        return winners
+    def scores(cls, rule, profile):
+        """ Scores of the candidates.
 
-    @classmethod
-    def _prepare_scoreboard_and_candidates(cls, preferences):
-        candidates = set(preferences[0])
-        scoreboard = {i: 0 for i in candidates}
-
-        return scoreboard, candidates
+        Parameters:
+        rule (str): the name of the rule
+        profile (Profile): the profile(s)
 
-    @classmethod
-    def _elect_borda(cls, preferences, counts):
-        scoreboard, candidates = cls._prepare_scoreboard_and_candidates(preferences)
+        Returns:
+        np.array(int): (m,) scores, or (n_profiles, m) for many profiles """
 
-        for candidate in candidates:
-            for ballot, count in zip(preferences, counts):
-                scoreboard[candidate] += (len(candidates) - 1 - ballot.index(candidate)) * count
-        return cls._find_winner(scoreboard)
+        if rule == 'plurality':
+            return profile.plurality_scores
+        elif rule == 'borda':
+            return profile.borda_scores
+        elif rule == 'copeland':
+            return profile.copeland_scores
+        else:
+            raise NotImplementedError(f'Rule {rule} unknown. Known rules: {cls.rules}')
 
     @classmethod
-    def _elect_plurality(cls, preferences, counts):
-        scoreboard, candidates = cls._prepare_scoreboard_and_candidates(preferences)
+    def winner_masks(cls, rule, profile):
+        """ Winners (ties included), as masks over profile.candidates.
 
-        for candidate in candidates:
-            for ballot, count in zip(preferences, counts):
-                if ballot[0] == candidate:
-                    scoreboard[candidate] += count
-        return cls._find_winner(scoreboard)
+        Parameters:
+        rule (str): the name of the rule
+        profile (Profile): the profile(s)
 
-    @classmethod
-    def _elect_copeland(cls, preferences, counts):
-        scoreboard, candidates = cls._prepare_scoreboard_and_candidates(preferences)
-
-        for candidate in candidates:
-            contenders = candidates - {candidate}
-            for enemy in contenders:
-                pairwise_c = 0
-                pairwise_e = 0
-                for ballot, count in zip(preferences, counts):
-                    if ballot.index(candidate) < ballot.index(enemy):
-                        pairwise_c += count
-                    elif ballot.index(candidate) > ballot.index(enemy):
-                        pairwise_e += count
-                if pairwise_c > pairwise_e:
-                    scoreboard[candidate] += 1
-                elif pairwise_c < pairwise_e:
-                    scoreboard[candidate] -= 1
-        return cls._find_winner(scoreboard)
+        Returns:
+        np.array(bool): (m,) mask of the winners, or (n_profiles, m) for many profiles """
+
+        scores = cls.scores(rule, profile)
+        return scores == scores.max(axis=-1, keepdims=True)
 
     @classmethod
-    def elect(cls, rule, preferences, counts, tiebreaking=lambda x: x):
+    def elect(cls, rule, preferences, counts=None, tiebreaking=lambda x: x):
         """ Elect a rule.
 
         Parameters:
         rule (str): the name of the rule to elect.
-        preferences (list(list(int))): ballots
+        preferences ([list(list(int)), Profile]): ballots, or a Profile (then counts must be None)
         counts (list(int)): one per ballot: how many people submitted that ballot
         tiebreaking (function): function to apply to the set of winners """
 
         assert rule in cls.rules, f'Unknown rule {rule}. Known rules: {cls.rules}'
 
-        if rule == 'plurality':
-            winners = cls._elect_plurality(preferences, counts)
-        elif rule == 'borda':
-            winners = cls._elect_borda(preferences, counts)
-        elif rule == 'copeland':
-            winners = cls._elect_copeland(preferences, counts)
-        else:
-            raise NotImplementedError(f'Rule {rule} unknown. Known rules: {cls.rules}')
+        profile = preferences if isinstance(preferences, Profile) else Profile(preferences, counts)
+        mask = cls.winner_masks(rule, profile)
+        winners = {c for c, winner in zip(profile.candidates, mask) if winner}
 
         return tiebreaking(winners)